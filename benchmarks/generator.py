@@ -0,0 +1,137 @@
+import random
+
+from ndtest import loader
+from ndtest import model
+
+LENGTH_DISTRIBUTIONS = ('uniform', 'exponential')
+
+
+class Cell(object):
+    """ Region of the pipeline holding at most one box of each inspection, so that boxes never overlap within the
+    same inspection. The circumferential range [u_start, u_end) may start below 0, in which case a box lying
+    across u = 0 is wrapped around 0/360 degrees.
+    """
+
+    def __init__(self, x_start, x_end, u_start, u_end):
+        self.x_start = x_start
+        self.x_end = x_end
+        self.u_start = u_start
+        self.u_end = u_end
+
+    def sample(self, rnd, length, wrapped=False):
+        """ Returns the (x, l, a, w) coordinates of a box within the cell, with the given length. """
+        width = (self.u_end - self.u_start) * rnd.uniform(0.2, 0.9)
+        if wrapped:
+            # The box lies across u = 0 and still within the cell: u_start <= u < 0 < u + width <= u_end.
+            u_low, u_high = max(self.u_start, -width), min(0, self.u_end - width)
+            u = u_low + (u_high - u_low) * rnd.uniform(0.1, 0.9)
+        else:
+            u = rnd.uniform(max(self.u_start, 0), self.u_end - width)
+        x = rnd.uniform(self.x_start, self.x_end - length)
+        return x, length, u % 360, width
+
+    def jitter(self, rnd, coordinates, amount):
+        """ Returns the coordinates of a box close to the given one and still within the cell. """
+        x, l, a, w = coordinates
+        u = a - 360 if a + w > 360 else a
+        l = min(l * rnd.uniform(1 - amount, 1 + amount), self.x_end - self.x_start)
+        x = min(max(x + l * rnd.uniform(-amount, amount), self.x_start), self.x_end - l)
+        w = min(w * rnd.uniform(1 - amount, 1 + amount), self.u_end - self.u_start)
+        u = min(max(u + w * rnd.uniform(-amount, amount), self.u_start), self.u_end - w)
+        return x, l, u % 360, w
+
+
+def _length(rnd, distribution, mean_length, max_length):
+    if distribution == 'uniform':
+        length = rnd.uniform(0, 2 * mean_length)
+    else:
+        length = rnd.expovariate(1. / mean_length)
+    return min(max(length, max_length * 0.001), max_length)
+
+
+def generate_pair(count, density=0.5, mean_length=2., length_distribution='exponential', wrap_fraction=0.05,
+                  joint_length=12., sectors=8, change=0.1, seed=None):
+    """ Generates two synthetic inspections of a pipeline with no overlaps within the same inspection.
+
+    The pipeline is made of joints of `joint_length` meters, each split in `sectors` circumferential sectors, and
+    each of the resulting cells holds a box with probability `density`. Boxes of the new inspection are the old ones
+    slightly moved and resized, while a fraction `change` of them disappears or is new.
+
+    Parameters
+    ----------
+    count : int
+        Number of boxes of the old inspection.
+    density : float
+        Probability of a cell to hold a box.
+    mean_length : float
+        Mean length (meters) of the boxes.
+    length_distribution : str
+        One of `LENGTH_DISTRIBUTIONS`.
+    wrap_fraction : float
+        Approximate fraction of the boxes wrapped around 0/360 degrees.
+    joint_length : float
+        Length (meters) of a joint, which is the greatest length of a box.
+    sectors : int
+        Number of circumferential sectors of a joint.
+    change : float
+        Fraction of the boxes of the old inspection which are not in the new one, and vice versa.
+    seed : int
+
+    Returns
+    -------
+    tuple[list[PipeBox], list[PipeBox]]
+        Old and new boxes ordered as done by `loader.load`.
+    """
+    if length_distribution not in LENGTH_DISTRIBUTIONS:
+        raise ValueError('Unknown length distribution %s' % length_distribution)
+    rnd = random.Random(seed)
+    sector_width = 360. / sectors
+    # A wrapping joint has its sectors rotated by half a sector, so that the first one lies across 0/360 degrees.
+    wrap_probability = min(1., wrap_fraction * sectors * density)
+    old_boxes, new_boxes = [], []
+    joint = 0
+    while len(old_boxes) < count:
+        x_start = joint * joint_length
+        wrapping = rnd.random() < wrap_probability
+        shift = sector_width / 2 if wrapping else 0
+        for sector in range(sectors):
+            if len(old_boxes) == count:
+                break
+            wrapped = wrapping and sector == 0
+            if not wrapped and rnd.random() >= density:
+                continue
+            cell = Cell(x_start, x_start + joint_length, sector * sector_width - shift,
+                        (sector + 1) * sector_width - shift)
+            length = _length(rnd, length_distribution, mean_length, joint_length)
+            coordinates = cell.sample(rnd, length, wrapped)
+            if rnd.random() >= change / 2:
+                old_boxes.append(model.PipeBox(len(old_boxes) + 1, *coordinates))
+            if rnd.random() >= change / 2:
+                new_boxes.append(model.PipeBox(len(new_boxes) + 1, *cell.jitter(rnd, coordinates, 0.1)))
+        joint += 1
+    old_boxes.sort(key=lambda b: (b.x, b.a))
+    new_boxes.sort(key=lambda b: (b.x, b.a))
+    return old_boxes, new_boxes
+
+
+def write(boxes, path):
+    """ Write boxes to a csv file readable by `loader.load`.
+
+    Parameters
+    ----------
+    boxes : list[PipeBox]
+    path : str
+
+    Returns
+    -------
+    None
+    """
+    with open(path, 'w') as csv_file:
+        csv_file.write('\t'.join(loader.CSV_HEADER) + '\n')
+        csv_file.writelines('%d\t%r\t%r\t%r\t%r\n' % (b.box_id, b.x, b.l, b.a, b.w) for b in boxes)
+
+
+def wrapped_fraction(boxes):
+    """ Fraction of the boxes wrapped around 0/360 degrees. """
+    return float(sum(1 for b in boxes if b.a + b.w > 360)) / len(boxes) if boxes else 0.
+
@@ -0,0 +1,169 @@
+""" Benchmark of the collation stages on synthetic inspections.
+
+Usage:
+    python -m benchmarks.run [--sizes 1000,10000] [--engines sweep,index] [--record FILE] [--compare FILE]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from ndtest import inspection
+from ndtest import loader
+from ndtest import output
+
+import generator
+
+SIZES = (1000, 10000, 100000, 1000000)
+ENGINES = ('sweep', 'index', 'columnar')
+
+# The nested engine is quadratic, thus it is skipped above this size.
+NESTED_MAX_SIZE = 10000
+
+# Relative slowdown beyond which `compare` reports a regression.
+TOLERANCE = 0.25
+
+
+class NullStream(object):
+    """ Stream discarding everything written to it, so that the output stage is timed without I/O. """
+
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def _best_time(function, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.time()
+        result = function()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench(size, engines, repeat=3, seed=None):
+    """ Times `loader.load`, `Collator.analyze` and `output.print_results` on a pair of synthetic inspections.
+
+    Parameters
+    ----------
+    size : int
+        Number of boxes of the old inspection.
+    engines : list[str]
+        Names of the collation engines, keys of `inspection.COLLATORS`.
+    repeat : int
+        Number of runs of each stage, of which the fastest is recorded.
+    seed : int
+
+    Returns
+    -------
+    list[dict]
+        One result for each stage, with keys `size`, `stage`, `engine` and `seconds`.
+    """
+    old_boxes, new_boxes = generator.generate_pair(size, seed=size if seed is None else seed)
+    directory = tempfile.mkdtemp(prefix='ndtest-bench-')
+    try:
+        old_path, new_path = os.path.join(directory, 'old.csv'), os.path.join(directory, 'new.csv')
+        generator.write(old_boxes, old_path)
+        generator.write(new_boxes, new_path)
+        seconds, old_data = _best_time(lambda: loader.load(old_path), repeat)
+        new_data = loader.load(new_path)
+    finally:
+        shutil.rmtree(directory)
+
+    results = [{'size': size, 'stage': 'load', 'engine': None, 'seconds': seconds}]
+    data = None
+    for engine in engines:
+        if engine == 'nested' and size > NESTED_MAX_SIZE:
+            continue
+        seconds, data = _best_time(lambda: inspection.COLLATORS[engine].analyze(old_data, new_data), repeat)
+        results.append({'size': size, 'stage': 'analyze', 'engine': engine, 'seconds': seconds})
+    if data is not None:
+        seconds, _ = _best_time(lambda: output.print_results(data, old_data, new_data, stream=NullStream()), repeat)
+        results.append({'size': size, 'stage': 'output', 'engine': None, 'seconds': seconds})
+    return results
+
+
+def _key(result):
+    return result['size'], result['stage'], result['engine']
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """ Returns the results slower than the matching ones of the baseline by more than `tolerance`.
+
+    Parameters
+    ----------
+    results : list[dict]
+        As returned by `bench`.
+    baseline : list[dict]
+        As recorded by a previous run.
+    tolerance : float
+        Relative slowdown allowed, e.g. 0.25 for 25%.
+
+    Returns
+    -------
+    list[tuple[dict, dict]]
+        Pairs of (result, baseline result).
+    """
+    baseline_map = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_map.get(_key(result))
+        if reference and result['seconds'] > reference['seconds'] * (1 + tolerance):
+            regressions.append((result, reference))
+    return regressions
+
+
+def _format(result):
+    return '%9d  %-8s %-9s %10.4f s' % (result['size'], result['stage'], result['engine'] or '-', result['seconds'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the collation stages on synthetic inspections.')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES[:-1])),
+                        help='Comma separated numbers of boxes (default: %(default)s)')
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help='Comma separated collation engines (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs of each stage (default: %(default)s)')
+    parser.add_argument('--record', help='Path to a JSON file where results are recorded')
+    parser.add_argument('--compare', help='Path to a JSON file of recorded results to compare with')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='Relative slowdown reported as a regression (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    engines = args.engines.split(',')
+    for engine in engines:
+        if engine not in inspection.COLLATORS:
+            print 'Unknown engine %s' % engine
+            return 1
+
+    results = []
+    for size in map(int, args.sizes.split(',')):
+        for result in bench(size, engines, args.repeat):
+            print _format(result)
+            results.append(result)
+
+    if args.record:
+        with open(args.record, 'w') as record_file:
+            json.dump(results, record_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for result, reference in regressions:
+            print 'Regression: %s (was %.4f s)' % (_format(result), reference['seconds'])
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,128 @@
 import argparse
+import cProfile
 import os
+import sys
 
 import app
+import binary
+import inspection
+import loader
+import output
+import profiling
+import series
+import server
+
+
+def convert(argv):
+    parser = argparse.ArgumentParser(prog='ndtest convert',
+                                     description='Convert inspection data from a csv file to a binary columnar file')
+    parser.add_argument('input', help='path to the csv file of the inspection')
+    parser.add_argument('output', help='path to the binary file to write')
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.input):
+        print 'input argument must be a valid file path'
+        return
+
+    binary.dump(loader.load(args.input), args.output)
+
+
+def track(argv):
+    parser = argparse.ArgumentParser(prog='ndtest series',
+                                     description='Track features across a series of pipeline inspections')
+    parser.add_argument('inspections', nargs='+',
+                        help='paths to the csv (or binary) files of the inspections, from the oldest to the latest')
+    parser.add_argument('--all-pairs', action='store_true',
+                        help='collate all pairs of inspections rather than only the consecutive ones')
+    parser.add_argument('--output', help='path to the file where the report is written, with no colors')
+    args = parser.parse_args(argv)
+
+    if len(args.inspections) < 2:
+        print 'at least two inspections are required'
+        return
+    for path in args.inspections:
+        if not os.path.isfile(path):
+            print '%s must be a valid file path' % path
+            return
+
+    tracks = series.Series.load(args.inspections).tracks(series.ALL_PAIRS if args.all_pairs else series.CONSECUTIVE)
+    output_file = open(args.output, 'wb') if args.output else None
+    try:
+        output.print_tracks(tracks, output_file)
+    finally:
+        if output_file:
+            output_file.close()
+
+
+def serve(argv):
+    parser = argparse.ArgumentParser(prog='ndtest serve',
+                                     description='Serve collations of new inspections with baselines held in memory')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen to (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8000, help='port to listen to (default: %(default)s)')
+    parser.add_argument('--baseline', action='append', default=[],
+                        help='path to the csv (or binary) file of a baseline loaded at start up (repeatable)')
+    parser.add_argument('--any-baseline', action='store_true',
+                        help='collate with any baseline file named by the requests as well, kept in memory until the '
+                             'server stops')
+    parser.add_argument('--cache-dir', help='directory where the baselines are cached, to skip their loading later')
+    args = parser.parse_args(argv)
+
+    if not args.baseline and not args.any_baseline:
+        print 'At least one --baseline argument is required, unless --any-baseline is given'
+        return
+    for path in args.baseline:
+        if not os.path.isfile(path):
+            print '--baseline arguments must be valid file paths'
+            return
+
+    baselines = server.BaselineStore(args.cache_dir, None if args.any_baseline else args.baseline)
+    for path in args.baseline:
+        baselines.get(path)
+    comparison_server = server.ComparisonServer((args.host, args.port), baselines)
+    print 'Serving on %s:%s' % comparison_server.server_address
+    try:
+        comparison_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        comparison_server.server_close()
+
+
+COMMANDS = {
+    'convert': convert,
+    'series': track,
+    'serve': serve,
+}
 
 
 def main():
-    parser = argparse.ArgumentParser(description='Compare pipeline inspection data given as csv files')
+    if sys.argv[1:2] and sys.argv[1] in COMMANDS:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description='Compare pipeline inspection data given as csv (or binary) files')
     parser.add_argument('--old', required=True, help='path to the csv file coming from the old inspection')
     parser.add_argument('--new', required=True, help='path to the csv file coming from the new inspection')
     parser.add_argument('--reverse', action='store_true',
                         help='print sections based on old boxes')
+    parser.add_argument('--engine', choices=sorted(inspection.COLLATORS), default='sweep',
+                        help='algorithm used to collate the inspections')
+    parser.add_argument('--stream', action='store_true',
+                        help='stream the inspections and print the report while collating (sweep engine only)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes among which the collation is partitioned along the pipeline')
+    parser.add_argument('--cache-dir',
+                        help='directory where the old inspection is cached, to skip its loading and indexing later')
+    parser.add_argument('--output', help='path to the file where the report is written, with no colors')
+    parser.add_argument('--format', choices=['text'] + sorted(output.RECORD_WRITERS), default='text',
+                        help='print the text report or write one record for each overlapping pair')
+    parser.add_argument('--lean', action='store_true',
+                        help='keep only areas and percents of the overlaps, not their geometry, to save memory')
+    parser.add_argument('--summary', action='store_true',
+                        help='print only counts, histograms of the percents and overlapped area by segment')
+    parser.add_argument('--stats', action='store_true',
+                        help='print to the standard error time and peak memory of each stage and collation counters')
+    parser.add_argument('--profile', help='path to the file where cProfile statistics of the run are dumped')
     args = parser.parse_args()
 
     if not os.path.isfile(args.old):
@@ -19,7 +132,40 @@ def main():
         print '--new arguments must be a valid file path'
         return
 
-    app.ndtest(args.old, args.new, args.reverse)
+    if args.workers < 1:
+        print '--workers argument must be a positive number'
+        return
+
+    if args.stream and (args.reverse or args.engine != 'sweep'):
+        print '--stream argument requires the sweep engine and cannot be used along with --reverse'
+        return
+
+    if args.stream and (args.workers > 1 or args.cache_dir):
+        print '--stream argument cannot be used along with --workers or --cache-dir'
+        return
+
+    if args.summary and args.workers > 1:
+        print '--summary argument cannot be used along with --workers'
+        return
+
+    stats = profiling.RunStats() if args.stats else None
+    run_args = (args.old, args.new, args.reverse, args.engine, args.stream, args.workers, args.cache_dir,
+                args.output, args.format, args.lean, args.summary, stats)
+    try:
+        if args.profile:
+            profiler = cProfile.Profile()
+            try:
+                profiler.runcall(app.ndtest, *run_args)
+            finally:
+                profiler.dump_stats(args.profile)
+        else:
+            app.ndtest(*run_args)
+    except loader.UnsortedDataException as e:
+        # Only streamed inspections are required to be ordered.
+        print '--stream argument requires inspections ordered by x and a. %s' % e
+        return
+    if stats:
+        stats.report()
 
 
 if __name__ == "__main__":
@@ -1,22 +1,119 @@
+import binary
+import cache
 import loader
 import inspection
 import output
+import parallel
+import profiling
 
 
-def ndtest(old_path, new_path, reverse):
-    """ Collate new inspection with an old one and print to the standard output a result report.
+def ndtest(old_path, new_path, reverse, engine='sweep', stream=False, workers=1, cache_dir=None, output_path=None,
+           output_format='text', lean=False, summary=False, stats=None):
+    """ Collate new inspection with an old one and print to the standard output (or to a file) a result report.
 
     Parameters
     ----------
     old_path : str
     new_path : str
     reverse : bool
+    engine : str
+        Name of the collation engine, one of the keys of `inspection.COLLATORS`.
+    stream : bool
+        If True, inspections are read by `loader.iter_load`, thus they must be already ordered, and streamed
+        through `inspection.SweepCollator` while the report is printed; `reverse`, `engine`, `workers` and
+        `cache_dir` are ignored.
+    workers : int
+        Number of processes among which the collation is partitioned along the pipeline.
+    cache_dir : str
+        Path to the directory of a `cache.BaselineCache` holding the old inspection (and its index for the
+        `index` engine), if any.
+    output_path : str
+        Path to the file where the report is written instead of the standard output, if any.
+    output_format : str
+        Either 'text' for the report or one of the keys of `output.RECORD_WRITERS` for machine-readable records,
+        which are written as they come from the collation (`reverse` is ignored).
+    lean : bool
+        If True, the results don't retain the geometry of the overlaps (see `inspection.LeanOverlapMetadata`).
+    summary : bool
+        If True, the collation is folded into a `summary.OverlapSummary` and only its aggregates are printed (`reverse`,
+        `output_format` and `lean` are ignored).
+    stats : profiling.RunStats
+        If given, stages of the run are timed and the collation counters are collected (the latter only in the
+        current process, i.e. not with more than one worker).
 
     Returns
     -------
     None
     """
-    old_data, new_data = loader.load(old_path), loader.load(new_path)
+    output_file = open(output_path, 'wb') if output_path else None
+    try:
+        _ndtest(old_path, new_path, reverse, engine, stream, workers, cache_dir, output_file, output_format, lean,
+                summary, stats)
+    finally:
+        if output_file:
+            output_file.close()
 
-    data = inspection.Collator.analyze(old_data, new_data)
-    output.print_results(data, old_data, new_data, reverse)
+
+def _ndtest(old_path, new_path, reverse, engine, stream, workers, cache_dir, output_file, output_format, lean,
+            summary, stats):
+    collator = inspection.COLLATORS['sweep' if stream else engine]
+    if stats:
+        collator = profiling.instrument(collator, stats)
+
+    if stream:
+        # Inspections are loaded, collated and written along with each other, checking their order on the fly
+        # rather than reading them in advance.
+        old_data, new_data = loader.iter_load(old_path), loader.iter_load(new_path)
+        with profiling.stage(stats, 'stream'):
+            if summary:
+                output.print_summary(collator.summarize(old_data, new_data), output_file)
+            elif output_format == 'text':
+                output.print_stream(collator.iter_groups(old_data, new_data, lean), output_file)
+            else:
+                output.write_records(collator.iter_analyze(old_data, new_data, lean), output_format, output_file)
+        return
+
+    baseline_cache = cache.BaselineCache(cache_dir) if cache_dir else None
+    if engine == 'columnar' and workers == 1 and not baseline_cache and (summary or output_format != 'text') \
+            and binary.is_binary(old_path) and binary.is_binary(new_path):
+        # Columns are read straight from the memory maps, while only the boxes of the overlapping pairs are made.
+        with profiling.stage(stats, 'load'):
+            old_data = old_source = binary.BinaryInspection(old_path)
+            new_data = binary.BinaryInspection(new_path)
+    elif not baseline_cache:
+        # Each inspection is read while the other is parsed.
+        new_data, old_data = loader.load_many([new_path, old_path], stats=stats)
+        old_source = old_data
+    else:
+        new_data = loader.load(new_path, stats)
+        with profiling.stage(stats, 'load'):
+            if engine == 'index' and workers == 1:
+                old_index = baseline_cache.load_index(old_path)
+                old_data, old_source = old_index.boxes, old_index
+            else:
+                old_data = old_source = baseline_cache.load(old_path)
+
+    if summary:
+        with profiling.stage(stats, 'analyze'):
+            overlap_summary = collator.summarize(old_source, new_data)
+        with profiling.stage(stats, 'output'):
+            output.print_summary(overlap_summary, output_file)
+        return
+
+    if workers > 1:
+        with profiling.stage(stats, 'analyze'):
+            data = parallel.analyze(old_data, new_data, workers, engine, lean)
+    elif output_format != 'text':
+        # Records are written as soon as they are collated.
+        with profiling.stage(stats, 'analyze and output'):
+            output.write_records(collator.iter_analyze(old_source, new_data, lean), output_format, output_file)
+        return
+    else:
+        with profiling.stage(stats, 'analyze'):
+            data = collator.collate(old_source, new_data, lean)
+
+    with profiling.stage(stats, 'output'):
+        if output_format == 'text':
+            output.print_results(data, old_data, new_data, reverse, output_file)
+        else:
+            output.write_records(output.iter_metadata(data), output_format, output_file)
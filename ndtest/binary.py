@@ -0,0 +1,202 @@
+import mmap
+import operator
+import struct
+
+import model
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = 'NDTB'
+VERSION = 1
+
+# Magic, version, sorted flag, count of boxes, bounds along x (start of the first box and end of the farthest one).
+# The header is padded to 64 bytes, so that the columns are aligned.
+HEADER = struct.Struct('<4sHBxQdd')
+HEADER_SIZE = 64
+
+# Columns follow the header in this order, each made of `count` little-endian items.
+COLUMNS = (('id', 'q'), ('x', 'd'), ('l', 'd'), ('a', 'd'), ('w', 'd'))
+
+# Number of items packed at a time by `dump`.
+BLOCK_SIZE = 65536
+
+
+class BinaryFormatException(Exception):
+    """ Custom binary format exception """
+
+
+def dump(boxes, path):
+    """ Write boxes to a binary columnar file, ordered as the list returned by `loader.load`.
+
+    Parameters
+    ----------
+    boxes : list[PipeBox]
+    path : str
+        Path to the binary file.
+
+    Returns
+    -------
+    None
+    """
+    boxes = sorted(boxes, key=operator.attrgetter('x', 'a'))
+    x_min = boxes[0].x if boxes else 0.
+    x_max = max(b.x + b.l for b in boxes) if boxes else 0.
+    with open(path, 'wb') as binary_file:
+        binary_file.write(HEADER.pack(MAGIC, VERSION, 1, len(boxes), x_min, x_max).ljust(HEADER_SIZE, '\0'))
+        for name, code in COLUMNS:
+            attribute = 'box_id' if name == 'id' else name
+            for start in range(0, len(boxes), BLOCK_SIZE):
+                values = [getattr(b, attribute) for b in boxes[start:start + BLOCK_SIZE]]
+                binary_file.write(struct.pack('<%d%s' % (len(values), code), *values))
+
+
+def is_binary(path):
+    """ Tells whether a file is in the binary columnar format of `dump`, rather than csv.
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    bool
+    """
+    with open(path, 'rb') as binary_file:
+        return binary_file.read(len(MAGIC)) == MAGIC
+
+
+class BinaryInspection(object):
+    """ Inspection stored in a binary columnar file written by `dump`, accessed through a read-only memory map. """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            Path to the binary file.
+
+        Raises
+        ------
+        BinaryFormatException
+            If the file is not a valid binary inspection.
+        """
+        with open(path, 'rb') as binary_file:
+            self._map = mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER_SIZE:
+            raise BinaryFormatException('Invalid binary inspection %s' % path)
+        magic, version, is_sorted, count, x_min, x_max = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise BinaryFormatException('Invalid binary inspection %s: magic %r, version %s' % (path, magic, version))
+        if len(self._map) != HEADER_SIZE + count * 8 * len(COLUMNS):
+            raise BinaryFormatException('Invalid binary inspection %s: truncated columns' % path)
+        self.sorted = bool(is_sorted)
+        self.count = count
+        self.x_min = x_min
+        self.x_max = x_max
+
+    def __len__(self):
+        return self.count
+
+    def _offset(self, name):
+        for i, (column, code) in enumerate(COLUMNS):
+            if column == name:
+                return HEADER_SIZE + i * self.count * 8, code
+        raise KeyError(name)
+
+    def column(self, name):
+        """ Returns a column of the inspection. With numpy it is a zero-copy array backed by the memory map.
+
+        Parameters
+        ----------
+        name : str
+            One of `id, x, l, a, w`.
+
+        Returns
+        -------
+        numpy.ndarray/tuple
+        """
+        offset, code = self._offset(name)
+        if numpy is not None:
+            return numpy.frombuffer(self._map, dtype='<%s8' % ('i' if code == 'q' else 'f'), count=self.count,
+                                    offset=offset)
+        return struct.unpack_from('<%d%s' % (self.count, code), self._map, offset)
+
+    def boxes(self):
+        """ Returns the boxes of the inspection, unpacked straight from the memory map.
+
+        Returns
+        -------
+        list[PipeBox]
+        """
+        columns = [struct.unpack_from('<%d%s' % (self.count, code), self._map, self._offset(name)[0])
+                   for name, code in COLUMNS]
+        return map(model.PipeBox, *columns)
+
+    def iter_boxes(self, block_size=BLOCK_SIZE):
+        """ Yields the boxes of the inspection in the order they are stored, unpacking `block_size` of them at a time
+        from the memory map.
+
+        Parameters
+        ----------
+        block_size : int
+
+        Returns
+        -------
+        generator[PipeBox]
+        """
+        offsets = [(self._offset(name)[0], code) for name, code in COLUMNS]
+        for start in xrange(0, self.count, block_size):
+            size = min(block_size, self.count - start)
+            columns = [struct.unpack_from('<%d%s' % (size, code), self._map, offset + start * 8)
+                       for offset, code in offsets]
+            for box in map(model.PipeBox, *columns):
+                yield box
+
+    def close(self):
+        self._map.close()
+
+
+def load(path):
+    """ Load data from a binary columnar file and return a list of boxes ordered as done by `loader.load`.
+
+    Parameters
+    ----------
+    path : str
+        Path to the binary file.
+
+    Returns
+    -------
+    list[PipeBox]
+    """
+    inspection = BinaryInspection(path)
+    try:
+        boxes = inspection.boxes()
+    finally:
+        inspection.close()
+    if not inspection.sorted:
+        boxes.sort(key=operator.attrgetter('x', 'a'))
+    return boxes
+
+
+def iter_load(path):
+    """ Yields the boxes of a binary columnar file in the order they are stored (see `BinaryInspection.sorted`),
+    holding in memory only a block of them at a time.
+
+    Parameters
+    ----------
+    path : str
+        Path to the binary file.
+
+    Returns
+    -------
+    generator[PipeBox]
+    """
+    inspection = BinaryInspection(path)
+    try:
+        for box in inspection.iter_boxes():
+            yield box
+    finally:
+        inspection.close()
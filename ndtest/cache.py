@@ -0,0 +1,149 @@
+import cPickle
+import hashlib
+import os
+import tempfile
+
+import binary
+import index
+import loader
+
+# Default bound (bytes) of the size of a cache directory.
+MAX_SIZE = 2 * 1024 ** 3
+
+# Version of the pickled `index.BoxIndex` entries, to be increased whenever that class changes.
+INDEX_VERSION = 1
+
+_READ_SIZE = 1024 ** 2
+
+
+class BaselineCache(object):
+    """ On-disk cache of baseline inspections, which are compared against many new ones.
+
+    Each baseline is stored already loaded and sorted in the binary format of `binary.dump`, along with the
+    `index.BoxIndex` built on it if requested. Entries are keyed by the hash of the content of the csv file, the
+    `loader.CSV_HEADER` and the versions of the stored formats, and they are evicted in least recently used order
+    once the size of the cache exceeds `max_size`.
+    """
+
+    def __init__(self, directory, max_size=MAX_SIZE):
+        """
+        Parameters
+        ----------
+        directory : str
+            Path to the cache directory, created if missing.
+        max_size : int
+            Bound (bytes) of the size of the cache directory.
+        """
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.max_size = max_size
+
+    def key(self, path):
+        """ Key of the cache entries of a csv file.
+
+        Parameters
+        ----------
+        path : str
+            Path to csv file.
+
+        Returns
+        -------
+        str
+        """
+        digest = hashlib.sha1('%s\n%s\n%s\n' % ('\t'.join(loader.CSV_HEADER), binary.VERSION, INDEX_VERSION))
+        with open(path, 'rb') as csv_file:
+            for block in iter(lambda: csv_file.read(_READ_SIZE), ''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _entry(self, key, extension):
+        return os.path.join(self.directory, '%s.%s' % (key, extension))
+
+    def _hit(self, entry):
+        if not os.path.isfile(entry):
+            return False
+        # The modification time tracks the last use of an entry.
+        os.utime(entry, None)
+        return True
+
+    def _store(self, entry, write):
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(handle)
+        try:
+            write(temp_path)
+            os.rename(temp_path, entry)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.evict()
+
+    def evict(self):
+        """ Removes the least recently used entries until the size of the cache is within `max_size`.
+
+        Returns
+        -------
+        None
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if not name.endswith('.tmp') and os.path.isfile(entry):
+                stat = os.stat(entry)
+                entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry in entries:
+            if size <= self.max_size:
+                break
+            os.remove(entry)
+            size -= entry_size
+
+    def load(self, path):
+        """ Same as `loader.load`, but the loaded boxes are read from the cache if there.
+
+        Parameters
+        ----------
+        path : str
+            Path to csv file.
+
+        Returns
+        -------
+        list[PipeBox]
+        """
+        return self._load(path, self.key(path))
+
+    def _load(self, path, key):
+        entry = self._entry(key, 'ndtb')
+        if self._hit(entry):
+            with loader.gc_disabled():
+                return binary.load(entry)
+        boxes = loader.load(path)
+        self._store(entry, lambda temp_path: binary.dump(boxes, temp_path))
+        return boxes
+
+    def load_index(self, path):
+        """ Returns the `index.BoxIndex` of the boxes of a csv file, which is read from the cache if there.
+
+        Parameters
+        ----------
+        path : str
+            Path to csv file.
+
+        Returns
+        -------
+        index.BoxIndex
+        """
+        key = self.key(path)
+        entry = self._entry(key, 'idx')
+        if self._hit(entry):
+            with open(entry, 'rb') as index_file, loader.gc_disabled():
+                return cPickle.load(index_file)
+        box_index = index.BoxIndex(self._load(path, key))
+
+        def write(temp_path):
+            with open(temp_path, 'wb') as index_file:
+                cPickle.dump(box_index, index_file, cPickle.HIGHEST_PROTOCOL)
+
+        self._store(entry, write)
+        return box_index
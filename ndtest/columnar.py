@@ -0,0 +1,207 @@
+import operator
+
+import binary
+import model
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('The columnar backend requires numpy (pip install ndtest[columnar])')
+
+
+class Columns(object):
+    """ Columnar representation of an inspection, i.e. one numpy array for each of the `id, x, l, a, w` columns.
+
+    Each box is also split into two bound regions in the same way done by `PipeBox.plain_regions`:
+    for a box wrapped around 0/360 degrees the first region lies at the bottom (a = 0) and the second one at the top,
+    while for a plain box the first region is the box itself and the second one is empty (w = 0).
+    """
+
+    def __init__(self, ids, x, l, a, w, boxes=None):
+        """
+        Parameters
+        ----------
+        ids, x, l, a, w : numpy.ndarray
+            Columns of the inspection.
+        boxes : list[PipeBox]
+            Boxes the columns come from, if any, otherwise boxes are made by `box` when needed.
+        """
+        _require_numpy()
+        self.ids = ids
+        self.x = x
+        self.l = l
+        self.a = a
+        self.w = w
+        self.boxes = boxes
+        self._made_boxes = {}
+
+        wrapped = a + w > 360
+        self.region_a = (numpy.where(wrapped, 0, a), numpy.where(wrapped, a, 0))
+        self.region_w = (numpy.where(wrapped, a + w - 360, w), numpy.where(wrapped, 360 - a, 0))
+        self.area = numpy.radians(w) * l
+
+    def __len__(self):
+        return len(self.ids)
+
+    def box(self, i):
+        """ Returns the i-th box. If the columns don't come from boxes, it is made on first access and then reused.
+
+        Parameters
+        ----------
+        i : int
+
+        Returns
+        -------
+        PipeBox
+        """
+        if self.boxes is not None:
+            return self.boxes[i]
+        box = self._made_boxes.get(i)
+        if box is None:
+            box = self._made_boxes[i] = model.PipeBox(int(self.ids[i]), float(self.x[i]), float(self.l[i]),
+                                                      float(self.a[i]), float(self.w[i]))
+        return box
+
+    @classmethod
+    def from_boxes(cls, boxes):
+        """
+        Parameters
+        ----------
+        boxes : list[PipeBox]
+
+        Returns
+        -------
+        Columns
+        """
+        _require_numpy()
+        count = len(boxes)
+        ids = numpy.fromiter((b.box_id for b in boxes), dtype=numpy.int64, count=count)
+        columns = [numpy.fromiter((getattr(b, name) for b in boxes), dtype=numpy.float64, count=count)
+                   for name in ('x', 'l', 'a', 'w')]
+        return cls(ids, *columns, boxes=boxes)
+
+    @classmethod
+    def from_binary(cls, inspection):
+        """ Columns backed by the memory map of a binary inspection, with no copy of the data.
+
+        Parameters
+        ----------
+        inspection : binary.BinaryInspection
+
+        Returns
+        -------
+        Columns
+        """
+        _require_numpy()
+        return cls(*[inspection.column(name) for name in ('id', 'x', 'l', 'a', 'w')])
+
+    @classmethod
+    def from_data(cls, data):
+        """ Columns of inspection data given as boxes, as a binary inspection, which is accessed with no copy (see
+        `from_binary`) if it is sorted, or as columns already.
+
+        Parameters
+        ----------
+        data : iterable[PipeBox]/binary.BinaryInspection/Columns
+
+        Returns
+        -------
+        Columns
+        """
+        if isinstance(data, Columns):
+            return data
+        if isinstance(data, binary.BinaryInspection):
+            if data.sorted:
+                return cls.from_binary(data)
+            return cls.from_boxes(sorted(data.boxes(), key=operator.attrgetter('x', 'a')))
+        return cls.from_boxes(list(data))
+
+
+def candidate_pairs(old, new, chunk_size=4096):
+    """ Yields chunks of candidate pairs (old_index, new_index) whose boxes overlap along x.
+    Old columns must be sorted along x (as done by `loader.load`), while there is no requirement on new ones.
+
+    Parameters
+    ----------
+    old : Columns
+    new : Columns
+    chunk_size : int
+        Number of new boxes handled by each chunk.
+
+    Returns
+    -------
+    generator[tuple[numpy.ndarray, numpy.ndarray]]
+    """
+    if not len(old):
+        return
+    max_length = old.l.max()
+    for start in range(0, len(new), chunk_size):
+        new_x = new.x[start:start + chunk_size]
+        # An old box may overlap only if old.x + old.l > new.x and old.x < new.x + new.l
+        lo = numpy.searchsorted(old.x, new_x - max_length, side='right')
+        hi = numpy.searchsorted(old.x, new_x + new.l[start:start + chunk_size], side='left')
+        counts = numpy.maximum(hi - lo, 0)
+        total = counts.sum()
+        if not total:
+            continue
+        new_index = numpy.repeat(numpy.arange(start, start + len(new_x)), counts)
+        offsets = numpy.arange(total) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        old_index = numpy.repeat(lo, counts) + offsets
+        yield old_index, new_index
+
+
+def _extent(start1, length1, start2, length2):
+    start = numpy.maximum(start1, start2)
+    return numpy.minimum(start1 + length1, start2 + length2) - start
+
+
+def overlap_pairs(old, new, old_index, new_index):
+    """ Computes in batch the overlap between the pairs of boxes old_index -> new_index.
+
+    Parameters
+    ----------
+    old : Columns
+    new : Columns
+    old_index : numpy.ndarray
+    new_index : numpy.ndarray
+
+    Returns
+    -------
+    tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        Overlap area, percent of overlapped area of the old boxes and that of the new boxes.
+    """
+    length = _extent(old.x[old_index], old.l[old_index], new.x[new_index], new.l[new_index])
+    area = numpy.zeros(len(old_index))
+    # Regions are combined in the same order of `PipeBox.overlap`, so that areas are summed up the same way.
+    for old_a, old_w in zip(old.region_a, old.region_w):
+        for new_a, new_w in zip(new.region_a, new.region_w):
+            width = _extent(old_a[old_index], old_w[old_index], new_a[new_index], new_w[new_index])
+            overlapping = (length > 0) & (width > 0)
+            area += numpy.where(overlapping, numpy.radians(width) * length, 0)
+    return area, area / old.area[old_index] * 100, area / new.area[new_index] * 100
+
+
+def overlaps(old, new, chunk_size=4096):
+    """ Yields chunks of overlapping pairs between old and new columns.
+
+    Parameters
+    ----------
+    old : Columns
+    new : Columns
+    chunk_size : int
+
+    Returns
+    -------
+    generator[tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]]
+        Tuples (old_index, new_index, area, percent_old, percent_new) restricted to the overlapping pairs.
+    """
+    for old_index, new_index in candidate_pairs(old, new, chunk_size):
+        area, percent_old, percent_new = overlap_pairs(old, new, old_index, new_index)
+        hits = area > 0
+        if hits.any():
+            yield old_index[hits], new_index[hits], area[hits], percent_old[hits], percent_new[hits]
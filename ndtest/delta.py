@@ -0,0 +1,110 @@
+import index
+import inspection
+
+
+class BoxDiff(object):
+    """ Differences between two revisions of the same inspection, matching boxes by `box_id`. """
+
+    def __init__(self, added, changed, removed):
+        """
+        Parameters
+        ----------
+        added : list[PipeBox]
+            Boxes of the revised inspection whose ids are not in the previous one.
+        changed : list[PipeBox]
+            Boxes of the revised inspection whose coordinates differ from those of the previous one.
+        removed : set[int]
+            Ids of the boxes of the previous inspection which are not in the revised one.
+        """
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+
+    def __repr__(self):
+        return '<%s [added=%s,changed=%s,removed=%s]>' % (self.__class__.__name__, len(self.added),
+                                                          len(self.changed), len(self.removed))
+
+    def __len__(self):
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+    @property
+    def stale_ids(self):
+        """ Ids of the boxes whose results are out of date, i.e. changed or removed.
+
+        Returns
+        -------
+        set[int]
+        """
+        return self.removed.union(box.box_id for box in self.changed)
+
+    @property
+    def boxes(self):
+        """ Boxes to collate again, i.e. added or changed.
+
+        Returns
+        -------
+        list[PipeBox]
+        """
+        return self.added + self.changed
+
+
+def diff(previous_data, revised_data):
+    """ Compares two revisions of the same inspection box by box.
+
+    Parameters
+    ----------
+    previous_data : iterable[PipeBox]
+    revised_data : iterable[PipeBox]
+
+    Returns
+    -------
+    BoxDiff
+    """
+    previous_map = {box.box_id: box for box in previous_data}
+    added, changed = [], []
+    revised_ids = set()
+    for box in revised_data:
+        revised_ids.add(box.box_id)
+        previous_box = previous_map.get(box.box_id)
+        if previous_box is None:
+            added.append(box)
+        elif previous_box != box:
+            changed.append(box)
+    return BoxDiff(added, changed, set(previous_map).difference(revised_ids))
+
+
+def patch(data, box_diff, old_data, lean=False):
+    """ Updates the results of a collation after the new inspection has been revised, collating again only the
+    added and changed boxes against the old inspection by means of `inspection.IndexCollator`.
+
+    Parameters
+    ----------
+    data : dict[int:dict[int:OverlapMetadata]]/OverlapStore
+        Results of the collation of the previous revision of the new inspection, as returned by `Collator.analyze`
+        (which is updated in place) or by `Collator.collate`.
+    box_diff : BoxDiff
+        Differences between the previous revision of the new inspection and the revised one, see `diff`.
+    old_data : list[PipeBox]/BoxIndex
+        Boxes of the old inspection, or an index built over them (e.g. by `cache.BaselineCache.load_index`) so that
+        it can be reused for several revisions.
+    lean : bool
+        If True, the new results are `LeanOverlapMetadata` objects which don't retain the overlapping boxes.
+
+    Returns
+    -------
+    dict[int:dict[int:OverlapMetadata]]/OverlapStore
+        Results of the collation of the revised inspection, of the same type of `data`.
+    """
+    stale_ids = box_diff.stale_ids
+    old_index = old_data if isinstance(old_data, index.BoxIndex) else index.BoxIndex(old_data)
+    metadata_iter = inspection.IndexCollator.iter_analyze(old_index, box_diff.boxes, lean)
+
+    if isinstance(data, inspection.OverlapStore):
+        kept = (metadata for metadata in data if metadata.id_new not in stale_ids)
+        return inspection.OverlapStore(list(kept) + list(metadata_iter))
+
+    for id_box_new in stale_ids:
+        data.pop(id_box_new, None)
+    for metadata in metadata_iter:
+        data.setdefault(metadata.id_new, {})[metadata.id_old] = metadata
+    return data
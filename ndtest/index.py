@@ -0,0 +1,164 @@
+import collections
+import math
+import operator
+
+import model
+
+
+class BoxIndex(object):
+    """ Static spatial index over a list of `PipeBox`, answering which boxes intersect a given region.
+
+    Boxes wrapped around 0/360 degrees are indexed through their `plain_regions`, so that every entry of the index is a
+    `BoundBox`-like region which never crosses the seam.
+    Entries are kept sorted by their initial position along x and arranged as an implicit balanced interval tree:
+    the node of the range [lo, hi) is the entry in the middle and it also stores the greatest end (x + l) of the
+    whole range, which allows a query to skip every subtree lying before the queried region.
+    A query costs O(log n + k) where k is the number of regions intersecting the queried one along x.
+    """
+
+    def __init__(self, boxes):
+        """
+        Parameters
+        ----------
+        boxes : iterable[PipeBox]
+        """
+        self.boxes = list(boxes)
+        entries = []
+        for box in self.boxes:
+            for region in box.plain_regions:
+                entries.append((region.x, region.x + region.l, region.a, region.a + region.w, box))
+        entries.sort(key=operator.itemgetter(0))
+        self._entries = entries
+        self._max_ends = [None] * len(entries)
+        self._build(0, len(entries))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return float('-inf')
+        mid = (lo + hi) // 2
+        max_end = max(self._entries[mid][1], self._build(lo, mid), self._build(mid + 1, hi))
+        self._max_ends[mid] = max_end
+        return max_end
+
+    def _search(self, x_start, x_end, a_start, a_end):
+        entries, max_ends = self._entries, self._max_ends
+        stack = [(0, len(entries))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if max_ends[mid] <= x_start:
+                # Every region of the subtree ends before the queried one starts.
+                continue
+            stack.append((lo, mid))
+            start, end, a, a_top, box = entries[mid]
+            if start >= x_end:
+                # The regions on the right start after the end of the queried one.
+                continue
+            stack.append((mid + 1, hi))
+            if end > x_start and a < a_end and a_start < a_top:
+                yield box
+
+    def query(self, box):
+        """ Returns the indexed boxes overlapping `box`.
+
+        Parameters
+        ----------
+        box : PipeBox
+
+        Returns
+        -------
+        list[PipeBox]
+        """
+        found = []
+        seen = set()
+        for region in box.plain_regions:
+            for candidate in self._search(region.x, region.x + region.l, region.a, region.a + region.w):
+                # A wrapped box can match with both of its regions.
+                if id(candidate) not in seen:
+                    seen.add(id(candidate))
+                    found.append(candidate)
+        return found
+
+    def query_region(self, x, l, a, w):
+        """ Returns the indexed boxes overlapping the region given by its coordinates (e.g. a weld joint).
+
+        Parameters
+        ----------
+        x : int/float
+        l : int/float
+        a : int/float
+        w : int/float
+
+        Returns
+        -------
+        list[PipeBox]
+        """
+        return self.query(model.PipeBox(None, x, l, a, w))
+
+
+class GridIndex(BoxIndex):
+    """ Static spatial index over a list of `PipeBox` bucketed in a 2D grid of cells, made of segments along x and
+    of sectors along the circumference.
+
+    As for `BoxIndex`, boxes wrapped around 0/360 degrees are indexed through their `plain_regions`, thus a wrapped
+    box is registered in the sectors of both its regions. Every region is registered in all the cells it covers and a
+    query visits only the cells covered by the queried region, so that boxes lying at other clock positions along the
+    same stretch of pipeline are never compared with it.
+    It suits long and sparse boxes, whose x-extents overlap a lot, as long as they are not much longer than a cell.
+    """
+
+    # Default number of sectors along the circumference.
+    SECTORS = 36
+
+    def __init__(self, boxes, cell_length=None, sectors=SECTORS):
+        """
+        Parameters
+        ----------
+        boxes : iterable[PipeBox]
+        cell_length : float
+            Length (meters) of the segments along x, by default the mean length of the boxes.
+        sectors : int
+            Number of sectors along the circumference.
+        """
+        self.boxes = list(boxes)
+        regions = [(region, box) for box in self.boxes for region in box.plain_regions]
+        if cell_length is None:
+            cell_length = sum(region.l for region, _ in regions) / len(regions) if regions else 0
+        self.cell_length = float(cell_length) or 1.
+        self.sectors = sectors
+        self._sector_width = 360. / sectors
+        cells = collections.defaultdict(list)
+        for region, box in regions:
+            entry = (region.x, region.x + region.l, region.a, region.a + region.w, box)
+            for cell in self._cells(*entry[:4]):
+                cells[cell].append(entry)
+        self._cells_map = dict(cells)
+        segments = [segment for segment, _ in self._cells_map]
+        self._segment_bounds = (min(segments), max(segments)) if segments else (0, -1)
+
+    def _cells(self, x_start, x_end, a_start, a_end, segment_bounds=None):
+        first_segment = int(math.floor(x_start / self.cell_length))
+        last_segment = max(first_segment, int(math.ceil(x_end / self.cell_length)) - 1)
+        if segment_bounds:
+            # Segments out of the extent of the index are empty.
+            first_segment, last_segment = max(first_segment, segment_bounds[0]), min(last_segment, segment_bounds[1])
+        first_sector = min(int(a_start // self._sector_width), self.sectors - 1)
+        last_sector = min(max(first_sector, int(math.ceil(a_end / self._sector_width)) - 1), self.sectors - 1)
+        for segment in xrange(first_segment, last_segment + 1):
+            for sector in xrange(first_sector, last_sector + 1):
+                yield segment, sector
+
+    def _search(self, x_start, x_end, a_start, a_end):
+        cells_map = self._cells_map
+        for cell in self._cells(x_start, x_end, a_start, a_end, self._segment_bounds):
+            entries = cells_map.get(cell)
+            if entries is None:
+                continue
+            for start, end, a, a_top, box in entries:
+                if start < x_end and end > x_start and a < a_end and a_start < a_top:
+                    yield box
@@ -1,10 +1,21 @@
+import array
+import bisect
 import collections
+import heapq
+import itertools
+import operator
+
+import columnar
+import index
+import summary
 
 
 class OverlapMetadata(object):
     """ A simple  class to hold overlapping metadata between a new box and an old one. """
 
-    def __init__(self, id_old, id_new, overlaps, percent_old, percent_new):
+    __slots__ = ('id_old', 'id_new', '_overlaps', 'percent_old', 'percent_new', 'area')
+
+    def __init__(self, id_old, id_new, overlaps, percent_old, percent_new, area=None):
         """
         Parameters
         ----------
@@ -18,21 +29,174 @@ class OverlapMetadata(object):
             Percent of overlapped area of the old box.
         percent_new : int/float
             Percent of overlapped area of the new box.
+        area : float
+            Overlapped area (see `Box.area`), computed from `overlaps` if not given.
         """
         self.id_old = id_old
         self.id_new = id_new
-        self.overlaps = overlaps
+        self._overlaps = overlaps
         self.percent_old = percent_old
         self.percent_new = percent_new
+        self.area = sum(o.area() for o in overlaps) if area is None else area
 
     def __repr__(self):
         return "<{name} [id_old={id_old},id_new={id_new},percent_old={percent_old},percent_new={percent_new}]>".format(
             name=self.__class__.__name__, id_old=self.id_old, id_new=self.id_new,
             percent_old=self.percent_old, percent_new=self.percent_new)
 
+    @property
+    def overlaps(self):
+        """ List of the overlapping boxes.
+
+        Returns
+        -------
+        list[Box]
+        """
+        return self._overlaps
+
+
+class LeanOverlapMetadata(OverlapMetadata):
+    """ Version of `OverlapMetadata` which retains only the scalar results of the overlap along with the boxes,
+    while the overlapping boxes are computed again whenever `overlaps` is read.
+    """
+
+    __slots__ = ('_old_box', '_new_box')
+
+    def __init__(self, old_box, new_box, percent_old, percent_new, area):
+        """
+        Parameters
+        ----------
+        old_box : PipeBox
+        new_box : PipeBox
+        percent_old : int/float
+            Percent of overlapped area of the old box.
+        percent_new : int/float
+            Percent of overlapped area of the new box.
+        area : float
+            Overlapped area (see `Box.area`).
+        """
+        self.id_old = old_box.box_id
+        self.id_new = new_box.box_id
+        self._overlaps = None
+        self._old_box = old_box
+        self._new_box = new_box
+        self.percent_old = percent_old
+        self.percent_new = percent_new
+        self.area = area
+
+    @property
+    def overlaps(self):
+        return self._old_box.overlap(self._new_box)
+
+
+class OverlapGroups(collections.Mapping):
+    """ Read-only view of the pairs of an `OverlapStore` grouped by the ids of the boxes of one inspection.
+    It behaves as the dictionary returned by `Collator.analyze` (or its reverse), but the inner dictionaries are
+    made on access out of a sorted index of the pairs.
+    """
+
+    def __init__(self, metadata, key, sub_key):
+        """
+        Parameters
+        ----------
+        metadata : list[OverlapMetadata]
+            Pairs of the store.
+        key : str
+            Attribute of `OverlapMetadata` the pairs are grouped by, either 'id_new' or 'id_old'.
+        sub_key : str
+            Attribute of `OverlapMetadata` identifying a pair within a group.
+        """
+        get_key, get_sub_key = operator.attrgetter(key), operator.attrgetter(sub_key)
+        self._metadata = metadata
+        self._sub_key = get_sub_key
+        self._order = array.array('l', sorted(xrange(len(metadata)),
+                                              key=lambda i: (get_key(metadata[i]), get_sub_key(metadata[i]))))
+        self._keys = [get_key(metadata[i]) for i in self._order]
+
+    def _range(self, key):
+        start = bisect.bisect_left(self._keys, key)
+        if start == len(self._keys) or self._keys[start] != key:
+            raise KeyError(key)
+        return start, bisect.bisect_right(self._keys, key, start)
+
+    def __getitem__(self, key):
+        start, end = self._range(key)
+        return {self._sub_key(m): m for m in (self._metadata[i] for i in self._order[start:end])}
+
+    def __contains__(self, key):
+        try:
+            self._range(key)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        keys = self._keys
+        for i, key in enumerate(keys):
+            if not i or keys[i - 1] != key:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class OverlapStore(object):
+    """ Bidirectional store of the results of a collation.
+    Pairs are held once in a flat list, while the forward view (grouped by new boxes) and the reverse one (grouped
+    by old boxes) are sorted indexes over that list, so that both views can be iterated without copying the results.
+    """
+
+    def __init__(self, metadata_iter):
+        """
+        Parameters
+        ----------
+        metadata_iter : iterable[OverlapMetadata]
+        """
+        self._metadata = list(metadata_iter)
+        self._forward = None
+        self._reverse = None
+
+    def __len__(self):
+        return len(self._metadata)
+
+    def __iter__(self):
+        return iter(self._metadata)
+
+    def forward(self):
+        """ Pairs grouped by the ids of the new boxes, i.e. {box_id_new: {box_id_old: OverlapMetadata}}.
+
+        Returns
+        -------
+        OverlapGroups
+        """
+        if self._forward is None:
+            self._forward = OverlapGroups(self._metadata, 'id_new', 'id_old')
+        return self._forward
+
+    def reverse(self):
+        """ Pairs grouped by the ids of the old boxes, i.e. {box_id_old: {box_id_new: OverlapMetadata}}.
+
+        Returns
+        -------
+        OverlapGroups
+        """
+        if self._reverse is None:
+            self._reverse = OverlapGroups(self._metadata, 'id_old', 'id_new')
+        return self._reverse
+
+
+def _collate_lean(new_box, old_boxes):
+    # Areas and percents of all the candidates are computed at once by `PipeBox.overlap_many`, with no regions.
+    overlaps = []
+    for old_box, result in itertools.izip(old_boxes, new_box.overlap_many(old_boxes)):
+        if result is not None:
+            area, new_percent, old_percent = result
+            overlaps.append((old_box, LeanOverlapMetadata(old_box, new_box, old_percent, new_percent, area)))
+    return overlaps
+
 
 class Collator(object):
-    """ It takes to list of boxes coming from inspections and """
+    """ It takes two lists of boxes coming from inspections and collates the new boxes with the old ones. """
 
     CONTINUE = "CONTINUE"
     BREAK = "BREAK"
@@ -89,7 +253,95 @@ class Collator(object):
         return cls.PASS
 
     @classmethod
-    def analyze(cls, old_data, new_data):
+    def _collate(cls, old_box, new_box, lean=False):
+        """ Returns the `OverlapMetadata` (`LeanOverlapMetadata` if lean) of the pair old_box -> new_box or None
+        if they don't overlap.
+        """
+        overlaps = old_box.overlap(new_box)
+        if not overlaps:
+            return None
+        overlap_area = sum(o.area() for o in overlaps)
+        new_percent = overlap_area / new_box.area() * 100
+        old_percent = overlap_area / old_box.area() * 100
+        if lean:
+            return LeanOverlapMetadata(old_box, new_box, old_percent, new_percent, overlap_area)
+        return OverlapMetadata(old_box.box_id, new_box.box_id, overlaps, old_percent, new_percent, overlap_area)
+
+    @classmethod
+    def _collate_many(cls, new_box, old_boxes, lean=False):
+        """ Returns the pairs (old_box, metadata) of the old boxes overlapping new_box, see `_collate`. """
+        overlaps = []
+        for old_box in old_boxes:
+            metadata = cls._collate(old_box, new_box, lean)
+            if metadata:
+                overlaps.append((old_box, metadata))
+        return overlaps
+
+    @classmethod
+    def _overlap_many(cls, new_box, old_boxes):
+        """ Returns the results of `PipeBox.overlap_many` of new_box over old_boxes, making no metadata. """
+        return new_box.overlap_many(old_boxes)
+
+    @classmethod
+    def _candidates(cls, old_data, new_data):
+        """ Yields a pair (new_box, old_boxes) for each box of the new inspection, where old_boxes are the boxes of
+        the old inspection surviving the pruning of `_prompt_statement`.
+        """
+        for new_box in new_data:
+            yield new_box, cls._scan(old_data, new_box)
+
+    @classmethod
+    def _scan(cls, old_data, new_box):
+        for old_box in old_data:
+            statement = cls._prompt_statement(old_box, new_box)
+            if statement == cls.BREAK:
+                break
+            elif statement == cls.CONTINUE:
+                continue
+            yield old_box
+
+    @classmethod
+    def iter_groups(cls, old_data, new_data, lean=False):
+        """ Collates the inspections yielding the results incrementally, one new box at a time.
+        When driven by `SweepCollator` with iterators of boxes (e.g. from `loader.stream`) it holds in memory only
+        the old boxes whose x-extent is still live.
+
+        Parameters
+        ----------
+        old_data : iterable[PipeBox]
+        new_data : iterable[PipeBox]
+        lean : bool
+            If True, results are `LeanOverlapMetadata` objects which don't retain the overlapping boxes.
+
+        Returns
+        -------
+        generator[tuple[PipeBox, list[tuple[PipeBox, OverlapMetadata]]]]
+            Pairs (new_box, overlaps) where overlaps lists the overlapped old boxes along with their metadata.
+        """
+        for new_box, old_boxes in cls._candidates(old_data, new_data):
+            yield new_box, cls._collate_many(new_box, old_boxes, lean)
+
+    @classmethod
+    def iter_analyze(cls, old_data, new_data, lean=False):
+        """ Same as `iter_groups` but yields only the `OverlapMetadata` objects.
+
+        Parameters
+        ----------
+        old_data : iterable[PipeBox]
+        new_data : iterable[PipeBox]
+        lean : bool
+            If True, results are `LeanOverlapMetadata` objects which don't retain the overlapping boxes.
+
+        Returns
+        -------
+        generator[OverlapMetadata]
+        """
+        for _, overlaps in cls.iter_groups(old_data, new_data, lean):
+            for _, metadata in overlaps:
+                yield metadata
+
+    @classmethod
+    def analyze(cls, old_data, new_data, lean=False):
         """ It implements the algorithm target of the test and returns a dictionary whose keys are box ids of the new
         inspection while values are dictionaries whose keys are box ids of the old inspection which values are
         `OverlapMetadata` objects who describe the overlap between the pairs box_id_new -> box_id_old pointing to
@@ -101,6 +353,8 @@ class Collator(object):
             List of boxes from an old inspection - list[PipeBox]
         new_data : list[PipeBox]
             List of boxes from a new inspection - list[PipeBox]
+        lean : bool
+            If True, results are `LeanOverlapMetadata` objects which don't retain the overlapping boxes.
 
         Returns
         -------
@@ -116,20 +370,184 @@ class Collator(object):
 
         """
         analysis_data = collections.defaultdict(dict)
+        for new_box, old_boxes in cls._candidates(old_data, new_data):
+            for old_box, metadata in cls._collate_many(new_box, old_boxes, lean):
+                analysis_data[new_box.box_id][old_box.box_id] = metadata
+        return analysis_data
+
+    @classmethod
+    def collate(cls, old_data, new_data, lean=False):
+        """ Same as `analyze` but the results are returned in an `OverlapStore`, which can be iterated by new boxes
+        as well as by old boxes without copying them.
+
+        Parameters
+        ----------
+        old_data : list[PipeBox]
+        new_data : list[PipeBox]
+        lean : bool
+            If True, results are `LeanOverlapMetadata` objects which don't retain the overlapping boxes.
+
+        Returns
+        -------
+        OverlapStore
+        """
+        return OverlapStore(cls.iter_analyze(old_data, new_data, lean))
+
+    @classmethod
+    def summarize(cls, old_data, new_data, overlap_summary=None):
+        """ Collates the inspections folding each overlapping pair into the running aggregates of a
+        `summary.OverlapSummary`, with no `OverlapMetadata` made nor retained.
+        As with `iter_groups`, `SweepCollator` accepts iterators of boxes (e.g. from `loader.stream`).
+
+        Parameters
+        ----------
+        old_data : iterable[PipeBox]
+        new_data : iterable[PipeBox]
+        overlap_summary : summary.OverlapSummary
+            Aggregates to update, by default new ones with the default bins and segments.
+
+        Returns
+        -------
+        summary.OverlapSummary
+        """
+        overlap_summary = summary.OverlapSummary() if overlap_summary is None else overlap_summary
+        for new_box, old_boxes in cls._candidates(old_data, new_data):
+            old_boxes = list(old_boxes)
+            overlap_summary.add(new_box, old_boxes, cls._overlap_many(new_box, old_boxes))
+        return overlap_summary
+
+
+class SweepCollator(Collator):
+    """ Sweep-line version of `Collator`.
+
+    Rather than restarting from the first old box for each new box, it moves a start pointer along the old data and
+    keeps an active set of the old boxes whose x-interval can still intersect the current new box.
+    Old boxes are retired as soon as the sweep passes their end `x + l`, so each of them is visited only while it is
+    live and the cost is about O((N + M) log M + K) rather than O(N * M).
+
+    Both old and new data must be sorted as done by `loader.load`, however they can be given as iterators which are
+    consumed along with the sweep.
+    """
+
+    @classmethod
+    def _candidates(cls, old_data, new_data):
+        old_iter = iter(old_data)
+        pending = next(old_iter, None)
+        sequence = itertools.count()
+        active = []
+        for new_box in new_data:
+            new_end = new_box.x + new_box.l
+            while pending is not None and pending.x < new_end:
+                # The sequence number prevents heapq from comparing boxes with equal ends.
+                heapq.heappush(active, (pending.x + pending.l, next(sequence), pending))
+                pending = next(old_iter, None)
+            while active and active[0][0] <= new_box.x:
+                # Later new boxes cannot start before the current one, thus the retired box will never overlap again.
+                heapq.heappop(active)
+            yield new_box, [old_box for _, _, old_box in active
+                            if cls._prompt_statement(old_box, new_box) == cls.PASS]
+
+    @classmethod
+    def _collate_many(cls, new_box, old_boxes, lean=False):
+        if lean:
+            return _collate_lean(new_box, old_boxes)
+        # The overlapping regions are made for every pair anyway.
+        return super(SweepCollator, cls)._collate_many(new_box, old_boxes, lean)
+
+
+class IndexCollator(Collator):
+    """ Version of `Collator` driven by a `index.BoxIndex` built over the old data.
+
+    The old data may be given as an already built `index.BoxIndex`, so that the same index can be reused to collate
+    several new inspections. New data doesn't need to be sorted.
+    """
+
+    @classmethod
+    def _candidates(cls, old_data, new_data):
+        old_index = old_data if isinstance(old_data, index.BoxIndex) else index.BoxIndex(old_data)
         for new_box in new_data:
-            for old_box in old_data:
-
-                statement = cls._prompt_statement(old_box, new_box)
-                if statement == cls.BREAK:
-                    break
-                elif statement == cls.CONTINUE:
-                    continue
-
-                overlaps = old_box.overlap(new_box)
-                if overlaps:
-                    overlap_area = sum(o.area() for o in overlaps)
-                    new_percent = overlap_area / new_box.area() * 100
-                    old_percent = overlap_area / old_box.area() * 100
-                    metadata = OverlapMetadata(new_box.box_id, old_box.box_id, overlaps, old_percent, new_percent)
-                    analysis_data[new_box.box_id][old_box.box_id] = metadata
+            yield new_box, old_index.query(new_box)
+
+    @classmethod
+    def _collate_many(cls, new_box, old_boxes, lean=False):
+        if lean:
+            return _collate_lean(new_box, old_boxes)
+        return super(IndexCollator, cls)._collate_many(new_box, old_boxes, lean)
+
+
+class GridCollator(IndexCollator):
+    """ Version of `Collator` driven by a `index.GridIndex` built over the old data, which prunes the pairs lying at
+    different clock positions as well as those lying at different positions along the pipeline.
+
+    The old data may be given as an already built index. New data doesn't need to be sorted.
+    """
+
+    @classmethod
+    def _candidates(cls, old_data, new_data):
+        old_index = old_data if isinstance(old_data, index.BoxIndex) else index.GridIndex(old_data)
+        return super(GridCollator, cls)._candidates(old_index, new_data)
+
+
+class ColumnarCollator(Collator):
+    """ Version of `Collator` backed by `columnar.Columns`: candidate pairs, overlap extents, areas and percents
+    are computed in batch by numpy, while `BoundBox` objects are made only for the overlapping pairs.
+
+    Old data must be sorted along x as done by `loader.load`. It requires numpy.
+    Both old and new data may be given as `binary.BinaryInspection` objects, whose columns are read straight from
+    the memory map, so that only the boxes of the overlapping pairs are made by `iter_analyze` and `summarize`.
+    """
+
+    @classmethod
+    def _hits(cls, old, new):
+        for old_index, new_index, area, percent_old, percent_new in columnar.overlaps(old, new):
+            for i_old, i_new, overlap_area, p_old, p_new in zip(old_index.tolist(), new_index.tolist(), area.tolist(),
+                                                                percent_old.tolist(), percent_new.tolist()):
+                yield i_old, i_new, overlap_area, p_old, p_new
+
+    @classmethod
+    def _candidates(cls, old_data, new_data):
+        old, new = columnar.Columns.from_data(old_data), columnar.Columns.from_data(new_data)
+        hits = collections.defaultdict(list)
+        for i_old, i_new, _, _, _ in cls._hits(old, new):
+            hits[i_new].append(old.box(i_old))
+        for i_new in xrange(len(new)):
+            yield new.box(i_new), hits.get(i_new, [])
+
+    @classmethod
+    def iter_analyze(cls, old_data, new_data, lean=False):
+        old, new = columnar.Columns.from_data(old_data), columnar.Columns.from_data(new_data)
+        for i_old, i_new, area, old_percent, new_percent in cls._hits(old, new):
+            old_box, new_box = old.box(i_old), new.box(i_new)
+            if lean:
+                yield LeanOverlapMetadata(old_box, new_box, old_percent, new_percent, area)
+            else:
+                yield OverlapMetadata(old_box.box_id, new_box.box_id, old_box.overlap(new_box),
+                                      old_percent, new_percent, area)
+
+    @classmethod
+    def analyze(cls, old_data, new_data, lean=False):
+        analysis_data = collections.defaultdict(dict)
+        for metadata in cls.iter_analyze(old_data, new_data, lean):
+            analysis_data[metadata.id_new][metadata.id_old] = metadata
         return analysis_data
+
+    @classmethod
+    def summarize(cls, old_data, new_data, overlap_summary=None):
+        overlap_summary = summary.OverlapSummary() if overlap_summary is None else overlap_summary
+        old, new = columnar.Columns.from_data(old_data), columnar.Columns.from_data(new_data)
+        matched = bytearray(len(new))
+        for i_old, i_new, area, old_percent, new_percent in cls._hits(old, new):
+            matched[i_new] = 1
+            overlap_summary.add_pair(old.box(i_old), new.box(i_new), area, new_percent, old_percent)
+        for is_matched in matched:
+            overlap_summary.add_new_box(is_matched)
+        return overlap_summary
+
+
+COLLATORS = {
+    'nested': Collator,
+    'sweep': SweepCollator,
+    'index': IndexCollator,
+    'grid': GridCollator,
+    'columnar': ColumnarCollator,
+}
@@ -1,42 +1,449 @@
+import contextlib
 import csv
+import gc
+import heapq
+import itertools
 import operator
+import tempfile
+from multiprocessing import pool
 
+import binary
 import model
+import profiling
 
 
 class DataLoaderException(Exception):
     """ Custom data loader exception """
 
 
+class UnsortedDataException(DataLoaderException):
+    """ Raised when data expected to be ordered by x and a is not """
+
+
 CSV_HEADER = ['id', 'x', 'l', 'a', 'w']
 
+# Number of boxes sorted in memory by `external_sort` before spilling them to a temporary file.
+CHUNK_SIZE = 500000
+
+# Greatest fraction of out of order boxes repaired by `order` merging them into the others, rather than sorting all.
+NEARLY_SORTED_FRACTION = 0.05
+
+# Greatest number of consecutive boxes that `order` takes as moved ahead of their position, rather than taking the
+# box following them as moved behind.
+MAX_DISPLACED = 8
+
+# Paths taken by `order`.
+PRESORTED = 'presorted'
+REPAIRED = 'repaired'
+SORTED = 'sorted'
+
+# Greatest number of threads loading inspections at a time in `load_many`.
+LOAD_THREADS = 4
+
+# Number of bytes read at a time by the block parser of `load`.
+BLOCK_SIZE = 4 * 1024 ** 2
+
+
+def _check_header(first_row):
+    if first_row != CSV_HEADER:
+        raise DataLoaderException('Invalid header. Expected %s got %s' % (CSV_HEADER, first_row))
+
+
+def _convert(rows, first_row_number=1):
+    """ Convert csv rows to boxes one by one, numbering them from `first_row_number` in error messages. """
+    for i, row in enumerate(rows, first_row_number):
+        if len(row) != len(CSV_HEADER):
+            raise DataLoaderException('Invalid data at row %s. Expected %s columns got %s' %
+                                      (i, len(CSV_HEADER), len(row)))
+        box_id, x, l, a, w = row
+        try:
+            box_id = int(box_id)
+            x, l, a, w = float(x), float(l), float(a), float(w)
+        except ValueError:
+            raise DataLoaderException('Invalid data at row %s. Columns must be numbers' % i)
+        yield model.PipeBox(box_id, x, l, a, w)
+
+
+def _parse(stream):
+    """ Parse inspection data from a stream yielding one box for each row. """
+    reader = csv.reader(stream, dialect=csv.excel_tab)
+    _check_header(reader.next())
+    return _convert(reader)
+
+
+def _convert_block(body, first_row_number):
+    lines = body.split('\n')
+    # Every line must be made of 5 fields, otherwise the fields of the flat list would be taken from the wrong rows.
+    if all(line.count('\t') == 4 for line in lines):
+        fields = '\t'.join(lines).split('\t')
+        # Columns are strided slices of the flat list of fields, thus no list is made for each row.
+        try:
+            return map(model.PipeBox, map(int, fields[0::5]), map(float, fields[1::5]), map(float, fields[2::5]),
+                       map(float, fields[3::5]), map(float, fields[4::5]))
+        except ValueError:
+            pass
+    # Quoted fields, malformed rows or invalid data: the block is parsed again row by row through the csv module,
+    # which either converts it or reports the offending row.
+    return list(_convert(csv.reader(lines, dialect=csv.excel_tab), first_row_number))
+
+
+def _parse_blocks(stream, block_size=BLOCK_SIZE):
+    """ Parse inspection data from a stream reading it in large blocks and yielding the list of boxes of each block.
+    Every column of a block is converted at once, while the csv module is used only for the header and for the blocks
+    which are not plain tab separated numbers.
+    """
+    header = stream.readline()
+    if not header:
+        return
+    _check_header(next(csv.reader([header], dialect=csv.excel_tab), []))
+    row_number = 1
+    tail = ''
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        text = tail + block
+        # The last line may continue in the next block.
+        end = text.rfind('\n')
+        if end < 0:
+            tail = text
+            continue
+        body, tail = text[:end], text[end + 1:]
+        yield _convert_block(body, row_number)
+        row_number += body.count('\n') + 1
+    if tail.strip():
+        yield _convert_block(tail, row_number)
+
+
+@contextlib.contextmanager
+def gc_disabled():
+    """ Context manager pausing the cyclic garbage collector while boxes are allocated by millions: they don't make
+    reference cycles, thus collecting them meanwhile is just overhead.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _check_sizes(boxes, first_row_number=1):
+    """ Raises if any box, numbered from `first_row_number` in error messages, has no length or width. """
+    for i, box in enumerate(boxes, first_row_number):
+        if box.l <= 0 or box.w <= 0:
+            raise DataLoaderException('Invalid data at row %s. Length and width must be positive' % i)
 
-def load(path):
+
+def load(path, stats=None, strict=False):
     """ Load data from a csv file and return a list of boxes ordered by the position in the longitudinal axis
     and that in the circumferential one respectively.
+    Files in the binary columnar format of `binary.dump` are loaded as well.
 
     Parameters
     ----------
     path : str
         Path to csv file.
+    stats : profiling.RunStats
+        If given, parsing and sorting are timed as the `load` and `sort` stages, while the path taken by `order`
+        is counted along with the boxes found out of order.
+    strict : bool
+        Whether boxes with a length or width not greater than 0, which have no area to be compared, are rejected.
 
     Returns
     -------
     list[PipeBox]
     """
-    reader = csv.reader(open(path), dialect=csv.excel_tab)
-    first_row = reader.next()
-    if first_row != CSV_HEADER:
-        raise DataLoaderException('Invalid header. Expected %s got %s' % (CSV_HEADER, first_row))
-    boxes = []
-    for i, (box_id, x, l, a, w) in enumerate(reader):
-        try:
-            box_id = int(box_id)
-            x, l, a, w = float(x), float(l), float(a), float(w)
-        except ValueError:
-            raise DataLoaderException('Invalid data at row %s. Columns must be numbers' % (i + 1))
-        boxes.append(model.PipeBox(box_id, x, l, a, w))
-    boxes.sort(key=operator.attrgetter('x', 'a'))
+    stream = open(path)
+    try:
+        if stream.read(len(binary.MAGIC)) == binary.MAGIC:
+            # The file was written by `ndtest convert`.
+            with profiling.stage(stats, 'load'), gc_disabled():
+                boxes = binary.load(path)
+            if strict:
+                _check_sizes(boxes)
+            return boxes
+        stream.seek(0)
+        return parse(stream, stats, strict)
+    finally:
+        stream.close()
+
+
+def parse(stream, stats=None, strict=False):
+    """ Same as `load` but the csv data is read from a stream, e.g. uploaded rather than stored in a file.
+
+    Parameters
+    ----------
+    stream : file
+    stats : profiling.RunStats
+    strict : bool
+
+    Returns
+    -------
+    list[PipeBox]
+    """
+    with profiling.stage(stats, 'load'):
+        boxes = []
+        with gc_disabled():
+            for block_boxes in _parse_blocks(stream):
+                if strict:
+                    _check_sizes(block_boxes, len(boxes) + 1)
+                boxes.extend(block_boxes)
+    with profiling.stage(stats, 'sort'):
+        boxes, path_taken, stragglers = order(boxes)
+    if stats:
+        stats.count('%s loads' % path_taken)
+        stats.count('stragglers', stragglers)
     return boxes
 
 
+def load_many(paths, threads=LOAD_THREADS, stats=None):
+    """ Load several inspections as done by `load`, concurrently in a pool of threads, so that reading a file (e.g.
+    from network storage) overlaps the parsing and sorting of the others.
+
+    Parameters
+    ----------
+    paths : list[str]
+        Paths to csv (or binary) files.
+    threads : int
+        Greatest number of files loaded at a time.
+    stats : profiling.RunStats
+        If given, the stages of `load` are timed, summing the time of each thread.
+
+    Returns
+    -------
+    list[list[PipeBox]]
+        Boxes of each file, in the order of `paths`.
+    """
+    if len(paths) < 2 or threads < 2:
+        return [load(path, stats) for path in paths]
+    thread_pool = pool.ThreadPool(min(len(paths), threads))
+    try:
+        # The collector is paused once for all the threads, since each of them would resume it as soon as it is done.
+        with gc_disabled():
+            return thread_pool.map(lambda path: load(path, stats), paths)
+    finally:
+        thread_pool.close()
+        thread_pool.join()
+
+
+def _bisect(boxes, box, right):
+    # Same as `bisect.bisect_left` (or `bisect_right`) on the (x, a) keys of boxes, which are not materialized.
+    lo, hi = 0, len(boxes)
+    x, a = box.x, box.a
+    while lo < hi:
+        mid = (lo + hi) // 2
+        other = boxes[mid]
+        if x < other.x or (x == other.x and (a < other.a or (a == other.a and not right))):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def order(boxes):
+    """ Orders boxes as the list returned by `load`, i.e. by x and a with ties kept in their original order.
+    Inspections are usually exported already ordered, in which case the boxes are only checked in a single pass.
+    If just a few boxes are out of order (no more than `NEARLY_SORTED_FRACTION`), they are sorted on their own and
+    inserted among the others, otherwise all the boxes are sorted.
+
+    Parameters
+    ----------
+    boxes : list[PipeBox]
+
+    Returns
+    -------
+    tuple[list[PipeBox], str, int]
+        The ordered boxes, the path taken (`PRESORTED`, `REPAIRED` or `SORTED`) and the number of boxes found
+        out of order.
+    """
+    ordered, stragglers = [], []
+    max_stragglers = len(boxes) * NEARLY_SORTED_FRACTION
+    last_x, last_a = float('-inf'), float('-inf')
+    for box in boxes:
+        x, a = box.x, box.a
+        if x > last_x or (x == last_x and a >= last_a):
+            ordered.append(box)
+            last_x, last_a = x, a
+            continue
+        # Either this box or the last ordered ones are out of place: the latter if they are just a few, e.g. boxes
+        # moved ahead of their position, otherwise this box was moved behind.
+        count = 0
+        while count < len(ordered) and count < MAX_DISPLACED:
+            other = ordered[-count - 1]
+            if x > other.x or (x == other.x and a >= other.a):
+                break
+            count += 1
+        if count < MAX_DISPLACED or count == len(ordered):
+            for _ in range(count):
+                stragglers.append(ordered.pop())
+            ordered.append(box)
+            last_x, last_a = x, a
+        else:
+            stragglers.append(box)
+        if len(stragglers) > max_stragglers:
+            boxes.sort(key=operator.attrgetter('x', 'a'))
+            return boxes, SORTED, len(stragglers)
+
+    if not stragglers:
+        return boxes, PRESORTED, 0
+
+    stragglers.sort(key=operator.attrgetter('x', 'a'))
+    # Ties are kept in their original order, thus the positions of the boxes in the input are needed, though only if
+    # there are any ties (stragglers are not in their original order among themselves).
+    positions = None
+    for previous, box in itertools.izip(stragglers, itertools.islice(stragglers, 1, None)):
+        if previous.x == box.x and previous.a == box.a:
+            positions = {id(b): i for i, b in enumerate(boxes)}
+            stragglers.sort(key=lambda b: (b.x, b.a, positions[id(b)]))
+            break
+    merged = []
+    start = 0
+    for box in stragglers:
+        end = _bisect(ordered, box, right=False)
+        tie_end = _bisect(ordered, box, right=True)
+        if tie_end > end:
+            if positions is None:
+                positions = {id(b): i for i, b in enumerate(boxes)}
+            position = positions[id(box)]
+            while end < tie_end and positions[id(ordered[end])] < position:
+                end += 1
+        merged.extend(ordered[start:end])
+        merged.append(box)
+        start = end
+    merged.extend(ordered[start:])
+    return merged, REPAIRED, len(stragglers)
+
+
+def _read(path):
+    """ Yields the boxes of a csv (or binary) file one at a time, in the order they are stored. """
+    stream = open(path)
+    try:
+        if stream.read(len(binary.MAGIC)) == binary.MAGIC:
+            boxes = binary.iter_load(path)
+        else:
+            stream.seek(0)
+            boxes = _parse(stream)
+        for box in boxes:
+            yield box
+    finally:
+        stream.close()
+
+
+def iter_load(path):
+    """ Load data from a csv file already ordered as the list returned by `load`, yielding one box at a time.
+    The order is checked on the fly. Files in the binary columnar format of `binary.dump` are read as well.
+
+    Parameters
+    ----------
+    path : str
+        Path to csv file.
+
+    Returns
+    -------
+    generator[PipeBox]
+
+    Raises
+    ------
+    UnsortedDataException
+        If the data is not ordered.
+    """
+    last_x, last_a = float('-inf'), float('-inf')
+    for i, box in enumerate(_read(path)):
+        if box.x < last_x or (box.x == last_x and box.a < last_a):
+            raise UnsortedDataException('Unsorted data at row %s. Rows must be ordered by x and a' % (i + 1))
+        last_x, last_a = box.x, box.a
+        yield box
+
+
+def _spill(boxes):
+    spill_file = tempfile.TemporaryFile()
+    spill_file.writelines('%d\t%r\t%r\t%r\t%r\n' % (b.box_id, b.x, b.l, b.a, b.w) for b in boxes)
+    spill_file.seek(0)
+    return spill_file
+
+
+def _unspill(spill_file, chunk_index):
+    # The chunk and row indexes make the merge stable and prevent the comparison of boxes.
+    for i, line in enumerate(spill_file):
+        box_id, x, l, a, w = line.split('\t')
+        x, a = float(x), float(a)
+        yield x, a, chunk_index, i, model.PipeBox(int(box_id), x, float(l), a, float(w))
+
+
+def external_sort(path, chunk_size=CHUNK_SIZE):
+    """ Load data from a csv file with no requirement on its order, yielding the boxes ordered as the list returned
+    by `load` while holding in memory no more than `chunk_size` boxes at a time.
+    Sorted chunks of data are spilled to temporary files which are then merged.
+
+    Parameters
+    ----------
+    path : str
+        Path to csv file.
+    chunk_size : int
+        Number of boxes sorted in memory at a time.
+
+    Returns
+    -------
+    generator[PipeBox]
+    """
+    spill_files = []
+    try:
+        boxes = _read(path)
+        try:
+            while True:
+                chunk = list(itertools.islice(boxes, chunk_size))
+                if not chunk:
+                    break
+                chunk.sort(key=operator.attrgetter('x', 'a'))
+                spill_files.append(_spill(chunk))
+        finally:
+            boxes.close()
+
+        for _, _, _, _, box in heapq.merge(*[_unspill(f, i) for i, f in enumerate(spill_files)]):
+            yield box
+    finally:
+        for spill_file in spill_files:
+            spill_file.close()
+
+
+def is_sorted(path):
+    """ Tells whether the data of a csv file is ordered as the list returned by `load`, without holding it in memory.
+
+    Parameters
+    ----------
+    path : str
+        Path to csv file.
+
+    Returns
+    -------
+    bool
+    """
+    try:
+        for _ in iter_load(path):
+            pass
+    except UnsortedDataException:
+        return False
+    return True
+
+
+def stream(path, chunk_size=CHUNK_SIZE):
+    """ Load data from a csv file yielding the boxes ordered as the list returned by `load` with a flat memory usage.
+    Data already ordered is streamed as it is read, otherwise it falls back to `external_sort`.
+    Files in the binary columnar format of `binary.dump` are streamed from their memory map.
+
+    Parameters
+    ----------
+    path : str
+        Path to csv file.
+    chunk_size : int
+        Number of boxes sorted in memory at a time by `external_sort`.
+
+    Returns
+    -------
+    generator[PipeBox]
+    """
+    if is_sorted(path):
+        return iter_load(path)
+    return external_sort(path, chunk_size)
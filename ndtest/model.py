@@ -4,6 +4,9 @@ import math
 class Box(object):
     """ Represent a specific area in the pipeline. """
 
+    # Inspections are made of a great number of boxes, thus they don't get an instance dictionary.
+    __slots__ = ('x', 'l', 'a', 'w')
+
     def __init__(self, x, l, a, w):
         """
         Parameters
@@ -27,10 +30,16 @@ class Box(object):
     def __eq__(self, other):
         return self.x == other.x and self.l == other.l and self.a == other.a and self.w == other.w
 
+    def __ne__(self, other):
+        return not self == other
+
     def __repr__(self):
         fields = 'x={x},l={l},a={a},w={w}'.format(x=self.x, l=self.l, a=self.a, w=self.w)
         return '<%s [%s]>' % (self.__class__.__name__, fields)
 
+    def __reduce_ex__(self, protocol):
+        return self.__class__, (self.x, self.l, self.a, self.w)
+
     def area(self):
         """ Area of the box normalized on the radius (i.e. area for one meter radius).
 
@@ -47,6 +56,8 @@ class BoundBox(Box):
             a + w <= 360
     """
 
+    __slots__ = ()
+
     def __init__(self, x, l, a, w):
         if a + w > 360:
             raise ValueError("BoundBox accepts a + w <= 360, got %s" % (a + w))
@@ -78,21 +89,100 @@ class BoundBox(Box):
 
 class PipeBox(Box):
 
+    __slots__ = ('box_id', '_regions', '_bounds')
+
+    # Number of BoundBox objects allocated by `plain_regions` since the last reset.
+    allocated_regions = 0
+
     def __init__(self, box_id, x, l, a, w):
         self.box_id = box_id
+        self._regions = None
+        self._bounds = None
         super(PipeBox, self).__init__(x, l, a, w)
 
     def __repr__(self):
         fields = 'id={id},x={x},l={l},a={a},w={w}'.format(id=self.box_id, x=self.x, l=self.l, a=self.a, w=self.w)
         return '<%s [%s]>' % (self.__class__.__name__, fields)
 
+    def __reduce_ex__(self, protocol):
+        return self.__class__, (self.box_id, self.x, self.l, self.a, self.w)
+
     @property
     def plain_regions(self):
+        """ The box split in BoundBox regions, i.e. two regions if it is wrapped around 0/360 degrees otherwise one.
+        Regions are computed once and cached along with the coordinates they come from, so that they are computed
+        again only if the coordinates of the box change.
+
+        Returns
+        -------
+        tuple[BoundBox]
+        """
+        cache = self._regions
+        if cache is not None and cache[0] == self.x and cache[1] == self.l and cache[2] == self.a \
+                and cache[3] == self.w:
+            return cache[4]
         if self.a + self.w > 360:
-            return [BoundBox(self.x, self.l, 0, self.a + self.w - 360),
-                    BoundBox(self.x, self.l, self.a, 360 - self.a)]
+            regions = (BoundBox(self.x, self.l, 0, self.a + self.w - 360),
+                       BoundBox(self.x, self.l, self.a, 360 - self.a))
         else:
-            return [BoundBox(self.x, self.l, self.a, self.w)]
+            regions = (BoundBox(self.x, self.l, self.a, self.w),)
+        PipeBox.allocated_regions += len(regions)
+        self._regions = (self.x, self.l, self.a, self.w, regions)
+        return regions
+
+    @property
+    def region_bounds(self):
+        """ Bounds of the `plain_regions`, cached along with them.
+
+        Returns
+        -------
+        tuple[tuple[float, float, float, float]]
+            Bounds (x_start, x_end, a_start, a_end) of each region.
+        """
+        regions = self.plain_regions
+        cache = self._bounds
+        if cache is None or cache[0] is not regions:
+            cache = (regions, tuple((r.x, r.x + r.l, r.a, r.a + r.w) for r in regions))
+            self._bounds = cache
+        return cache[1]
+
+    def overlap_many(self, candidates):
+        """ Computes the overlapped area of the box with each of the candidates, along with the percent of both
+        boxes covered by it, in a single call working on the `region_bounds` and making no `BoundBox`.
+        Areas are summed in the same order as `candidate.overlap(self)`, thus they are equal to the sum of the areas
+        of the regions it returns.
+
+        Parameters
+        ----------
+        candidates : iterable[PipeBox]
+
+        Returns
+        -------
+        list[tuple[float, float, float]]
+            For each candidate either a tuple (area, percent_self, percent_candidate) or None if they don't overlap.
+        """
+        radians = math.radians
+        self_bounds = self.region_bounds
+        self_area = self.area()
+        results = []
+        for candidate in candidates:
+            area = 0
+            overlapping = False
+            for x_start, x_end, a_start, a_end in candidate.region_bounds:
+                for self_x_start, self_x_end, self_a_start, self_a_end in self_bounds:
+                    if x_end <= self_x_start or self_x_end <= x_start:
+                        continue
+                    if a_end <= self_a_start or self_a_end <= a_start:
+                        continue
+                    x = max(x_start, self_x_start)
+                    a = max(a_start, self_a_start)
+                    area += radians(min(a_end, self_a_end) - a) * (min(x_end, self_x_end) - x)
+                    overlapping = True
+            if overlapping:
+                results.append((area, area / self_area * 100, area / candidate.area() * 100))
+            else:
+                results.append(None)
+        return results
 
     def overlap(self, other, bound_boxes=True):
         """
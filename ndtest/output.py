@@ -1,15 +1,50 @@
 import collections
+import csv
+import json
+import struct
+import sys
+
+import inspection
 
 RESET = '0'
 COLOR_NAMES = ('black', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white')
 FOREGROUND_COLORS = {COLOR_NAMES[x]: '3%s' % x for x in range(8)}
 
+# Number of characters of a report collected before writing them to the output stream.
+BUFFER_SIZE = 1024 ** 2
 
-def color_print(text, fg):
-    """ Print text enclosed in ANSI graphics codes.
+# Fields of the records written by `write_records`.
+RECORD_FIELDS = ('id_new', 'id_old', 'percent_new', 'percent_old', 'area')
+
+# The columnar format of `write_records` starts with a magic string and is followed by row groups, each made of
+# the count of its records and then of one little-endian column for each of the `RECORD_FIELDS`.
+COLUMNAR_MAGIC = 'NDTR\x01'
+COLUMNAR_GROUP_SIZE = 65536
+_COLUMNAR_CODES = ('q', 'q', 'd', 'd', 'd')
+
+
+def colorize(text, fg):
+    """ Returns text enclosed in ANSI graphics codes.
     Valid colors:
         'black', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white'
 
+    Parameters
+    ----------
+    text : str
+        Text to colorize.
+    fg : str
+        Foreground color.
+
+    Returns
+    -------
+    str
+    """
+    return '\x1b[%sm%s\x1b[%sm' % (FOREGROUND_COLORS[fg], text or '', RESET)
+
+
+def color_print(text, fg):
+    """ Print text enclosed in ANSI graphics codes (see `colorize`).
+
     Parameters
     ----------
     text : str
@@ -21,8 +56,52 @@ def color_print(text, fg):
     -------
     None
     """
-    text = '%s\x1b[%sm' % (text or '', RESET)
-    print '%s%s' % (('\x1b[%sm' % FOREGROUND_COLORS[fg]), text or '')
+    print colorize(text, fg)
+
+
+class BufferedWriter(object):
+    """ Collects the lines of a report and writes them to a stream in large blocks. """
+
+    def __init__(self, stream, color, buffer_size=BUFFER_SIZE):
+        """
+        Parameters
+        ----------
+        stream : file
+            Stream to write to.
+        color : bool
+            If True, lines are enclosed in ANSI graphics codes.
+        buffer_size : int
+            Number of characters collected before writing them.
+        """
+        self.stream = stream
+        self.color = color
+        self.buffer_size = buffer_size
+        self._chunks = []
+        self._size = 0
+
+    def write_line(self, text, fg=None):
+        """ Appends a line to the report, colorized with `fg` if colors are enabled. """
+        if self.color and fg:
+            text = colorize(text, fg)
+        self._chunks.append(text)
+        self._chunks.append('\n')
+        self._size += len(text) + 1
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.stream.write(''.join(self._chunks))
+        self._chunks = []
+        self._size = 0
+        self.stream.flush()
+
+
+def _writer(stream, color):
+    stream = sys.stdout if stream is None else stream
+    if color is None:
+        # Colors are dropped when the report is piped or written to a file.
+        color = hasattr(stream, 'isatty') and stream.isatty()
+    return BufferedWriter(stream, color)
 
 
 def reverse_data(data):
@@ -54,26 +133,253 @@ def reverse_data(data):
     return dict(new_data)
 
 
-def _print_results(data, ref_data, sub_data, label):
+def _print_section(writer, ref_box, sub_boxes, label):
+    if not sub_boxes:
+        writer.write_line("New box %s doesn't overlap old boxes!\n" % ref_box, fg='red')
+        return
+    length = len(sub_boxes)
+    writer.write_line("%s box %s overlaps %s old %s:\n" %
+                      (label.title(), ref_box, length, "boxes" if length > 1 else "box"), fg='green')
+    for i, (sub_box, metadata) in enumerate(sub_boxes):
+        writer.write_line("    %s. %s" % (i + 1, sub_box), fg='cyan')
+        writer.write_line("    ----> percent overlap: new = %.2f %% - old = %.2f %%\n" %
+                          (metadata.percent_new, metadata.percent_old), fg='yellow')
+
+
+def _print_results(writer, data, ref_data, sub_data, label):
     sub_data_map = {sub_box.box_id: sub_box for sub_box in sub_data}
 
-    print
+    writer.write_line('')
     for ref_box in ref_data:
-        if ref_box.box_id not in data:
-            color_print("New box %s doesn't overlap old boxes!\n" % ref_box, fg='red')
-            continue
-        length = len(data[ref_box.box_id])
-        color_print("%s box %s overlaps %s old %s:\n" %
-                    (label.title(), ref_box, length, "boxes" if length > 1 else "box"), fg='green')
-        for i, id_box_sub in enumerate(sorted(data[ref_box.box_id])):
-            metadata = data[ref_box.box_id][id_box_sub]
-            color_print("    %s. %s" % (i + 1, sub_data_map[id_box_sub]), fg='cyan')
-            color_print("    ----> percent overlap: new = %.2f %% - old = %.2f %%\n" %
-                        (metadata.percent_new, metadata.percent_old), fg='yellow')
-
-
-def print_results(data, old_data, new_data, reverse=False):
-    if reverse:
-        _print_results(reverse_data(data), old_data, new_data, 'old')
+        overlaps = data.get(ref_box.box_id, {})
+        _print_section(writer, ref_box,
+                       [(sub_data_map[id_box_sub], overlaps[id_box_sub]) for id_box_sub in sorted(overlaps)], label)
+    writer.flush()
+
+
+def print_results(data, old_data, new_data, reverse=False, stream=None, color=None):
+    """ Print the report of the collation returned by `Collator.analyze` (or by `Collator.collate`).
+
+    Parameters
+    ----------
+    data : dict[int:dict[int:OverlapMetadata]]/OverlapStore
+    old_data : list[PipeBox]
+    new_data : list[PipeBox]
+    reverse : bool
+        If True, sections are based on old boxes.
+    stream : file
+        Stream to write to, by default the standard output.
+    color : bool
+        If True, lines are colored by ANSI graphics codes; by default only if `stream` is a terminal.
+
+    Returns
+    -------
+    None
+    """
+    writer = _writer(stream, color)
+    if isinstance(data, inspection.OverlapStore):
+        if reverse:
+            _print_results(writer, data.reverse(), old_data, new_data, 'old')
+        else:
+            _print_results(writer, data.forward(), new_data, old_data, 'new')
+    elif reverse:
+        _print_results(writer, reverse_data(data), old_data, new_data, 'old')
     else:
-        _print_results(data, new_data, old_data, 'new')
+        _print_results(writer, data, new_data, old_data, 'new')
+
+
+def print_stream(groups, stream=None, color=None):
+    """ Print the sections of the new boxes as soon as they are yielded by `Collator.iter_groups`.
+
+    Parameters
+    ----------
+    groups : iterable[tuple[PipeBox, list[tuple[PipeBox, OverlapMetadata]]]]
+    stream : file
+        Stream to write to, by default the standard output.
+    color : bool
+        If True, lines are colored by ANSI graphics codes; by default only if `stream` is a terminal.
+
+    Returns
+    -------
+    None
+    """
+    writer = _writer(stream, color)
+    writer.write_line('')
+    for new_box, overlaps in groups:
+        _print_section(writer, new_box, sorted(overlaps, key=lambda overlap: overlap[0].box_id), 'new')
+    writer.flush()
+
+
+def print_tracks(tracks, stream=None, color=None):
+    """ Print the tracks of features returned by `series.Series.tracks`, each with its boxes and areas by run.
+
+    Parameters
+    ----------
+    tracks : list[Track]
+    stream : file
+        Stream to write to, by default the standard output.
+    color : bool
+        If True, lines are colored by ANSI graphics codes; by default only if `stream` is a terminal.
+
+    Returns
+    -------
+    None
+    """
+    writer = _writer(stream, color)
+    writer.write_line('')
+    for i, track in enumerate(tracks):
+        runs = track.runs
+        growth = track.growth()
+        writer.write_line("Track %s found in %s %s, growth = %s:\n" %
+                          (i + 1, len(runs), "runs" if len(runs) > 1 else "run",
+                           "n/a" if growth is None else "%.2f" % growth), fg='green')
+        areas = dict(track.areas())
+        for run, box in track.boxes:
+            writer.write_line("    run %s. %s" % (run, box), fg='cyan')
+        writer.write_line("    ----> area: %s\n" % ' - '.join('run %s = %.4f' % (run, areas[run]) for run in runs),
+                          fg='yellow')
+    writer.flush()
+
+
+def print_summary(overlap_summary, stream=None, color=None):
+    """ Print the aggregates of the collation returned by `Collator.summarize`.
+
+    Parameters
+    ----------
+    overlap_summary : summary.OverlapSummary
+    stream : file
+        Stream to write to, by default the standard output.
+    color : bool
+        If True, lines are colored by ANSI graphics codes; by default only if `stream` is a terminal.
+
+    Returns
+    -------
+    None
+    """
+    writer = _writer(stream, color)
+    writer.write_line('')
+    writer.write_line("New boxes: %s" % overlap_summary.new_boxes, fg='green')
+    writer.write_line("New boxes which don't overlap old boxes: %s" % overlap_summary.unmatched_new, fg='red')
+    writer.write_line("Overlapping pairs: %s" % overlap_summary.pairs, fg='green')
+    writer.write_line("Overlapped area: %.4f\n" % overlap_summary.area, fg='green')
+    writer.write_line("Percent overlap of the pairs:\n", fg='green')
+    for (lower, upper), count_new, count_old in zip(overlap_summary.histogram_edges(),
+                                                    overlap_summary.percent_new_histogram,
+                                                    overlap_summary.percent_old_histogram):
+        writer.write_line("    %6.2f - %6.2f %%: new = %s - old = %s" % (lower, upper, count_new, count_old),
+                          fg='cyan')
+    writer.write_line('')
+    writer.write_line("Overlapped area by segment:\n", fg='green')
+    for x_start, x_end, area in overlap_summary.segments():
+        writer.write_line("    x = %s - %s: %.4f" % (x_start, x_end, area), fg='yellow')
+    writer.flush()
+
+
+def iter_metadata(data):
+    """ Yields the `OverlapMetadata` objects of the dictionary returned by `Collator.analyze`.
+
+    Parameters
+    ----------
+    data : dict[int:dict[int:OverlapMetadata]]/OverlapStore
+
+    Returns
+    -------
+    generator[OverlapMetadata]
+    """
+    if isinstance(data, inspection.OverlapStore):
+        for metadata in data:
+            yield metadata
+        return
+    for overlaps in data.itervalues():
+        for metadata in overlaps.itervalues():
+            yield metadata
+
+
+def _record(metadata):
+    return metadata.id_new, metadata.id_old, metadata.percent_new, metadata.percent_old, metadata.area
+
+
+def _write_jsonl(metadata_iter, stream):
+    writer = BufferedWriter(stream, color=False)
+    for metadata in metadata_iter:
+        writer.write_line(json.dumps(dict(zip(RECORD_FIELDS, _record(metadata)))))
+    writer.flush()
+
+
+def _write_csv(metadata_iter, stream):
+    writer = csv.writer(stream)
+    writer.writerow(RECORD_FIELDS)
+    for metadata in metadata_iter:
+        writer.writerow(['%r' % value for value in _record(metadata)])
+
+
+def _write_columnar_group(records, stream):
+    stream.write(struct.pack('<I', len(records)))
+    for code, column in zip(_COLUMNAR_CODES, zip(*records)):
+        stream.write(struct.pack('<%d%s' % (len(column), code), *column))
+
+
+def _write_columnar(metadata_iter, stream):
+    stream.write(COLUMNAR_MAGIC)
+    records = []
+    for metadata in metadata_iter:
+        records.append(_record(metadata))
+        if len(records) == COLUMNAR_GROUP_SIZE:
+            _write_columnar_group(records, stream)
+            records = []
+    if records:
+        _write_columnar_group(records, stream)
+
+
+def read_columnar(stream):
+    """ Reads the records written by `write_records` in the columnar format, one row group at a time.
+
+    Parameters
+    ----------
+    stream : file
+
+    Returns
+    -------
+    generator[dict[str:tuple]]
+        Dictionaries whose keys are the `RECORD_FIELDS` and whose values are the columns of a row group.
+    """
+    if stream.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError('Invalid columnar records')
+    while True:
+        header = stream.read(4)
+        if not header:
+            return
+        count, = struct.unpack('<I', header)
+        group = {}
+        for field, code in zip(RECORD_FIELDS, _COLUMNAR_CODES):
+            group[field] = struct.unpack('<%d%s' % (count, code), stream.read(count * 8))
+        yield group
+
+
+RECORD_WRITERS = {
+    'jsonl': _write_jsonl,
+    'csv': _write_csv,
+    'columnar': _write_columnar,
+}
+
+
+def write_records(metadata_iter, output_format, stream=None):
+    """ Write one machine-readable record (see `RECORD_FIELDS`) for each overlapping pair, as soon as it is yielded.
+
+    Parameters
+    ----------
+    metadata_iter : iterable[OverlapMetadata]
+        E.g. as yielded by `Collator.iter_analyze`.
+    output_format : str
+        One of the keys of `RECORD_WRITERS`: 'jsonl' (one JSON object per line), 'csv' (with a header line) or
+        'columnar' (binary row groups, see `read_columnar`).
+    stream : file
+        Stream to write to, by default the standard output.
+
+    Returns
+    -------
+    None
+    """
+    stream = sys.stdout if stream is None else stream
+    RECORD_WRITERS[output_format](metadata_iter, stream)
+    stream.flush()
@@ -0,0 +1,90 @@
+import bisect
+import collections
+import multiprocessing
+
+import inspection
+
+# Number of chunks handed to each worker, so that a slow chunk doesn't keep the other workers idle.
+CHUNKS_PER_WORKER = 4
+
+
+def partition(old_data, new_data, chunks):
+    """ Partitions the inspections along the x axis.
+    New data is split into contiguous chunks, and each of them is paired with the slice of old data whose boxes
+    can intersect it, i.e. the old boxes within the extent of the chunk widened by the longest old box.
+    Thus every new box belongs to exactly one chunk, while old boxes near the boundaries may belong to more than one.
+
+    Parameters
+    ----------
+    old_data : list[PipeBox]
+        Old boxes sorted as done by `loader.load`.
+    new_data : list[PipeBox]
+        New boxes sorted as done by `loader.load`.
+    chunks : int
+        Number of chunks of new data.
+
+    Returns
+    -------
+    list[tuple[list[PipeBox], list[PipeBox]]]
+        Pairs of (old_chunk, new_chunk).
+    """
+    if not old_data or not new_data:
+        return []
+    old_xs = [box.x for box in old_data]
+    margin = max(box.l for box in old_data)
+    size = -(-len(new_data) // chunks)
+    partitions = []
+    for start in range(0, len(new_data), size):
+        new_chunk = new_data[start:start + size]
+        x_start = new_chunk[0].x
+        x_end = max(box.x + box.l for box in new_chunk)
+        lo = bisect.bisect_right(old_xs, x_start - margin)
+        hi = bisect.bisect_left(old_xs, x_end)
+        partitions.append((old_data[lo:hi], new_chunk))
+    return partitions
+
+
+def _analyze_chunk(task):
+    engine, lean, old_chunk, new_chunk = task
+    return dict(inspection.COLLATORS[engine].analyze(old_chunk, new_chunk, lean))
+
+
+def analyze(old_data, new_data, workers, engine='sweep', lean=False):
+    """ Same as `Collator.analyze` but the inspections are partitioned along the x axis by `partition` and each
+    chunk is collated in a pool of processes.
+
+    Parameters
+    ----------
+    old_data : list[PipeBox]
+        Old boxes sorted as done by `loader.load`.
+    new_data : list[PipeBox]
+        New boxes sorted as done by `loader.load`.
+    workers : int
+        Number of processes.
+    engine : str
+        Name of the collation engine, one of the keys of `inspection.COLLATORS`.
+    lean : bool
+        If True, results are `LeanOverlapMetadata` objects which don't retain the overlapping boxes.
+
+    Returns
+    -------
+    dict[int:dict[int:OverlapMetadata]]
+    """
+    tasks = [(engine, lean, old_chunk, new_chunk)
+             for old_chunk, new_chunk in partition(old_data, new_data, workers * CHUNKS_PER_WORKER)]
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = pool.map(_analyze_chunk, tasks)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    analysis_data = collections.defaultdict(dict)
+    for result in results:
+        for id_box_new, overlaps in result.iteritems():
+            # Pairs are keyed by ids, so a pair coming from more than one chunk is stored once.
+            analysis_data[id_box_new].update(overlaps)
+    return analysis_data
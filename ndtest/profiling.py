@@ -0,0 +1,141 @@
+import collections
+import contextlib
+import sys
+import threading
+import time
+
+import model
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Counters reported by `RunStats.report`, in this order.
+COUNTERS = ('presorted loads', 'repaired loads', 'sorted loads', 'stragglers',
+            'statements', 'CONTINUE', 'BREAK', 'PASS', 'candidate pairs', 'empty overlaps', 'regions allocated')
+
+
+def peak_memory():
+    """ Peak resident memory (bytes) of the process so far, or None if it is not available on the platform.
+
+    Returns
+    -------
+    int
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes while OS X reports bytes.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RunStats(object):
+    """ Collects the wall time and the peak memory of the stages of a run along with the collation counters. """
+
+    def __init__(self):
+        self.stages = collections.OrderedDict()
+        self.counters = collections.defaultdict(int)
+        self._regions_start = model.PipeBox.allocated_regions
+        # Stages may run in more than one thread, e.g. in `loader.load_many`.
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """ Context manager timing a stage of the run. Time of stages with the same name is summed.
+
+        Parameters
+        ----------
+        name : str
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            with self._lock:
+                seconds, _ = self.stages.get(name, (0., None))
+                self.stages[name] = (seconds + time.time() - start, peak_memory())
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def report(self, stream=None):
+        """ Write a table of the stages and of the counters.
+
+        Parameters
+        ----------
+        stream : file
+            Stream to write to, by default the standard error.
+
+        Returns
+        -------
+        None
+        """
+        stream = sys.stderr if stream is None else stream
+        self.counters['regions allocated'] = model.PipeBox.allocated_regions - self._regions_start
+        lines = ['%-20s %12s %14s' % ('stage', 'wall time', 'peak memory')]
+        for name, (seconds, peak) in self.stages.iteritems():
+            memory = '%.1f MB' % (peak / 1024. ** 2) if peak is not None else '-'
+            lines.append('%-20s %10.3f s %14s' % (name, seconds, memory))
+        lines.append('')
+        lines.append('%-20s %12s' % ('counter', 'value'))
+        for name in COUNTERS:
+            lines.append('%-20s %12d' % (name, self.counters[name]))
+        stream.write('\n'.join(lines) + '\n')
+        stream.flush()
+
+
+@contextlib.contextmanager
+def stage(stats, name):
+    """ Same as `RunStats.stage` but doing nothing if `stats` is None. """
+    if stats is None:
+        yield
+    else:
+        with stats.stage(name):
+            yield
+
+
+def instrument(collator, stats):
+    """ Returns a subclass of `collator` which counts into `stats` the statements of `_prompt_statement` and the
+    candidate pairs collated by `_collate_many` (or by `_overlap_many` when summarizing), along with those which
+    don't overlap at all.
+    Collators computing overlaps in batch (i.e. `inspection.ColumnarCollator`) bypass both of them.
+
+    Parameters
+    ----------
+    collator : type
+        Subclass of `inspection.Collator`.
+    stats : RunStats
+
+    Returns
+    -------
+    type
+    """
+
+    class InstrumentedCollator(collator):
+
+        @classmethod
+        def _prompt_statement(cls, old_box, new_box):
+            statement = super(InstrumentedCollator, cls)._prompt_statement(old_box, new_box)
+            stats.count('statements')
+            stats.count(statement)
+            return statement
+
+        @classmethod
+        def _collate_many(cls, new_box, old_boxes, lean=False):
+            old_boxes = list(old_boxes)
+            overlaps = super(InstrumentedCollator, cls)._collate_many(new_box, old_boxes, lean)
+            stats.count('candidate pairs', len(old_boxes))
+            stats.count('empty overlaps', len(old_boxes) - len(overlaps))
+            return overlaps
+
+        @classmethod
+        def _overlap_many(cls, new_box, old_boxes):
+            results = super(InstrumentedCollator, cls)._overlap_many(new_box, old_boxes)
+            stats.count('candidate pairs', len(results))
+            stats.count('empty overlaps', results.count(None))
+            return results
+
+    InstrumentedCollator.__name__ = 'Instrumented%s' % collator.__name__
+    return InstrumentedCollator
@@ -0,0 +1,175 @@
+import collections
+import itertools
+import operator
+
+import index
+import inspection
+import loader
+
+CONSECUTIVE = 'consecutive'
+ALL_PAIRS = 'all'
+
+
+class Track(object):
+    """ Lineage of a feature across a series of inspections, i.e. the boxes linked to each other by overlaps. """
+
+    def __init__(self, boxes):
+        """
+        Parameters
+        ----------
+        boxes : list[tuple[int, PipeBox]]
+            Pairs (run, box) where run is the index of the inspection within the series.
+        """
+        self.boxes = sorted(boxes, key=lambda item: (item[0], item[1].x, item[1].a))
+
+    def __repr__(self):
+        return '<%s [runs=%s,boxes=%s]>' % (self.__class__.__name__, self.runs, len(self.boxes))
+
+    @property
+    def runs(self):
+        """ Indexes of the inspections where the feature was found.
+
+        Returns
+        -------
+        list[int]
+        """
+        return sorted(set(run for run, _ in self.boxes))
+
+    def areas(self):
+        """ Area (see `Box.area`) of the feature in each inspection where it was found, which may be made of more
+        than one box if it was split or merged.
+
+        Returns
+        -------
+        list[tuple[int, float]]
+            Pairs (run, area) ordered by run.
+        """
+        return [(run, sum(box.area() for _, box in boxes))
+                for run, boxes in itertools.groupby(self.boxes, key=operator.itemgetter(0))]
+
+    def growth(self):
+        """ Ratio of the area of the feature in the last inspection where it was found to the area in the first one.
+
+        Returns
+        -------
+        float
+            None if the area in the first inspection is null (e.g. boxes of null length).
+        """
+        areas = self.areas()
+        if not areas[0][1]:
+            return None
+        return areas[-1][1] / areas[0][1]
+
+
+class Series(object):
+    """ Series of inspections of the same pipeline, ordered from the oldest to the latest, collated with each other.
+    Each inspection is loaded once and its `index.BoxIndex` is built at most once, whatever the number of pairs it is
+    collated in.
+    """
+
+    def __init__(self, runs):
+        """
+        Parameters
+        ----------
+        runs : list[list[PipeBox]]
+            Boxes of each inspection, from the oldest to the latest.
+        """
+        self.runs = runs
+        self._indexes = {}
+
+    @classmethod
+    def load(cls, paths):
+        """ Load the series from csv (or binary) files, from the oldest inspection to the latest.
+
+        Parameters
+        ----------
+        paths : list[str]
+
+        Returns
+        -------
+        Series
+        """
+        return cls([loader.load(path) for path in paths])
+
+    def __len__(self):
+        return len(self.runs)
+
+    def index(self, run):
+        """ Returns the `index.BoxIndex` of an inspection, building it on first access. """
+        if run not in self._indexes:
+            self._indexes[run] = index.BoxIndex(self.runs[run])
+        return self._indexes[run]
+
+    def pairs(self, mode=CONSECUTIVE):
+        """ Pairs of inspections to collate.
+
+        Parameters
+        ----------
+        mode : str
+            Either `CONSECUTIVE` (each inspection with the next one) or `ALL_PAIRS`.
+
+        Returns
+        -------
+        list[tuple[int, int]]
+            Pairs (old_run, new_run).
+        """
+        if mode == CONSECUTIVE:
+            return [(run, run + 1) for run in range(len(self.runs) - 1)]
+        if mode == ALL_PAIRS:
+            return list(itertools.combinations(range(len(self.runs)), 2))
+        raise ValueError('Unknown mode %s' % mode)
+
+    def collate(self, mode=CONSECUTIVE, lean=True):
+        """ Collates the pairs of inspections given by `pairs`.
+
+        Parameters
+        ----------
+        mode : str
+            Either `CONSECUTIVE` or `ALL_PAIRS`.
+        lean : bool
+            If True, results are `LeanOverlapMetadata` objects which don't retain the overlapping boxes.
+
+        Returns
+        -------
+        dict[tuple[int, int]:dict[int:dict[int:OverlapMetadata]]]
+            Results of `Collator.analyze` for each pair (old_run, new_run).
+        """
+        return {(old_run, new_run): inspection.IndexCollator.analyze(self.index(old_run), self.runs[new_run], lean)
+                for old_run, new_run in self.pairs(mode)}
+
+    def tracks(self, mode=CONSECUTIVE):
+        """ Groups the boxes of all the inspections in tracks, linking each pair of overlapping boxes.
+        With `ALL_PAIRS` a feature missed by an inspection is still tracked across it.
+
+        Parameters
+        ----------
+        mode : str
+            Either `CONSECUTIVE` or `ALL_PAIRS`.
+
+        Returns
+        -------
+        list[Track]
+            Tracks ordered by the first inspection where the feature was found and then by position.
+        """
+        parents = {}
+
+        def find(node):
+            root = node
+            while parents.get(root, root) != root:
+                root = parents[root]
+            while node != root:
+                parents[node], node = root, parents[node]
+            return root
+
+        for (old_run, new_run), data in self.collate(mode).iteritems():
+            for id_box_new, overlaps in data.iteritems():
+                for id_box_old in overlaps:
+                    parents[find((old_run, id_box_old))] = find((new_run, id_box_new))
+
+        groups = collections.defaultdict(list)
+        for run, boxes in enumerate(self.runs):
+            for box in boxes:
+                groups[find((run, box.box_id))].append((run, box))
+        tracks = [Track(boxes) for boxes in groups.itervalues()]
+        tracks.sort(key=lambda track: (track.boxes[0][0], track.boxes[0][1].x, track.boxes[0][1].a))
+        return tracks
@@ -0,0 +1,219 @@
+import BaseHTTPServer
+import SocketServer
+import cStringIO
+import json
+import itertools
+import os
+import threading
+import traceback
+import urlparse
+
+import binary
+import cache
+import index
+import inspection
+import loader
+import output
+
+
+class UnknownBaselineException(Exception):
+    """ Raised when a baseline is not among those a `BaselineStore` may hold """
+
+
+class BaselineStore(object):
+    """ Baseline inspections held in memory already loaded and indexed, to be collated with many new ones.
+    A baseline is loaded on first use (through a `cache.BaselineCache` if given) and again only if its file changes.
+    """
+
+    def __init__(self, cache_dir=None, paths=None):
+        """
+        Parameters
+        ----------
+        cache_dir : str
+            Path to the directory of a `cache.BaselineCache`, if any.
+        paths : list[str]
+            Paths to the only baselines which may be held, otherwise any file may be, and is kept until the store is
+            dropped.
+        """
+        self._cache = cache.BaselineCache(cache_dir) if cache_dir else None
+        self._paths = None if paths is None else frozenset(os.path.abspath(path) for path in paths)
+        self._baselines = {}
+        # The store-wide lock guards only the dictionaries, while a baseline is loaded under the lock of its path, so
+        # that a cold load doesn't hold up the requests for the other baselines.
+        self._lock = threading.Lock()
+        self._path_locks = {}
+
+    def get(self, path):
+        """ Returns the index of a baseline.
+
+        Parameters
+        ----------
+        path : str
+            Path to the csv (or binary) file of the baseline.
+
+        Returns
+        -------
+        index.BoxIndex
+
+        Raises
+        ------
+        UnknownBaselineException
+            If the store may not hold it.
+        KeyError
+            If there is no such file.
+        """
+        path = os.path.abspath(path)
+        if self._paths is not None and path not in self._paths:
+            raise UnknownBaselineException('%s is not a baseline of the server' % path)
+        if not os.path.isfile(path):
+            raise KeyError(path)
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            entry = self._baselines.get(path)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+        with path_lock:
+            # The baseline may have been loaded meanwhile by another request.
+            with self._lock:
+                entry = self._baselines.get(path)
+            if entry is None or entry[0] != mtime:
+                box_index = self._cache.load_index(path) if self._cache else index.BoxIndex(loader.load(path))
+                with self._lock:
+                    entry = self._baselines[path] = (mtime, box_index)
+        return entry[1]
+
+    def items(self):
+        """ Baselines held in memory.
+
+        Returns
+        -------
+        list[tuple[str, index.BoxIndex]]
+            Pairs (path, index) sorted by path.
+        """
+        with self._lock:
+            return sorted((path, box_index) for path, (_, box_index) in self._baselines.iteritems())
+
+    def __len__(self):
+        return len(self._baselines)
+
+
+class ComparisonHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Handles the requests of a `ComparisonServer`:
+
+        GET /baselines
+            JSON list of the baselines held in memory, with their number of boxes.
+        POST /collate?old=PATH[&new=PATH][&format=FORMAT][&reverse=1][&lean=1]
+            Collates the new inspection, either uploaded as csv in the body of the request or read from the `new`
+            path, with the baseline at the `old` path. The response is the text report or, with `format`, the
+            records written by `output.write_records`.
+    """
+
+    headers_sent = False
+
+    def _send_headers(self, code, content_type):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.end_headers()
+        self.headers_sent = True
+
+    def _send_error(self, code, message):
+        self._send_headers(code, 'text/plain')
+        self.wfile.write('%s\n' % message)
+
+    def do_GET(self):
+        url = urlparse.urlparse(self.path)
+        if url.path != '/baselines':
+            self._send_error(404, 'Unknown resource %s' % url.path)
+            return
+        baselines = [{'path': path, 'boxes': len(box_index)} for path, box_index in self.server.baselines.items()]
+        self._send_headers(200, 'application/json')
+        json.dump(baselines, self.wfile)
+
+    def do_POST(self):
+        try:
+            self._collate()
+        except Exception:
+            # Once the headers are sent the status can't be changed, thus the response is just cut short.
+            if self.headers_sent:
+                raise
+            self.log_error('%s', traceback.format_exc())
+            self._send_error(500, 'Internal error')
+
+    def _collate(self):
+        url = urlparse.urlparse(self.path)
+        if url.path != '/collate':
+            self._send_error(404, 'Unknown resource %s' % url.path)
+            return
+        query = dict(urlparse.parse_qsl(url.query))
+        output_format = query.get('format', 'text')
+        if 'old' not in query:
+            self._send_error(400, 'old argument is required')
+            return
+        if output_format != 'text' and output_format not in output.RECORD_WRITERS:
+            self._send_error(400, 'Unknown format %s' % output_format)
+            return
+
+        try:
+            old_index = self.server.baselines.get(query['old'])
+        except UnknownBaselineException as e:
+            self._send_error(403, e)
+            return
+        except KeyError:
+            self._send_error(404, 'old argument must be a valid file path')
+            return
+        except (ValueError, loader.DataLoaderException, binary.BinaryFormatException) as e:
+            self._send_error(400, e)
+            return
+        if 'new' not in query:
+            try:
+                length = int(self.headers.getheader('Content-Length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._send_error(400, 'Invalid Content-Length %s' % self.headers.getheader('Content-Length'))
+                return
+        try:
+            # Boxes without area are rejected, since the percents of their overlaps would divide by zero.
+            if 'new' in query:
+                new_data = loader.load(query['new'], strict=True)
+            else:
+                new_data = loader.parse(cStringIO.StringIO(self.rfile.read(length)), strict=True)
+        except (IOError, ValueError, loader.DataLoaderException, binary.BinaryFormatException) as e:
+            # ValueError comes from boxes with invalid coordinates, see `model.Box`.
+            self._send_error(400, e)
+            return
+
+        lean = query.get('lean') == '1'
+        if output_format == 'text':
+            # The report is made before the headers are sent, so that a failing collation is answered with an error.
+            data = inspection.IndexCollator.collate(old_index, new_data, lean)
+            report = cStringIO.StringIO()
+            output.print_results(data, old_index.boxes, new_data, query.get('reverse') == '1', report)
+            self._send_headers(200, 'text/plain')
+            self.wfile.write(report.getvalue())
+        else:
+            # Records are still written as they are collated, while the first one is taken before the headers.
+            metadata_iter = iter(inspection.IndexCollator.iter_analyze(old_index, new_data, lean))
+            first = list(itertools.islice(metadata_iter, 1))
+            self._send_headers(200, 'text/plain')
+            output.write_records(itertools.chain(first, metadata_iter), output_format, self.wfile)
+
+
+class ComparisonServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """ HTTP server collating new inspections with baselines held in a `BaselineStore`, one thread per request.
+    Indexes of the baselines are only read by the collation, thus they are shared by all the requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, baselines):
+        """
+        Parameters
+        ----------
+        address : tuple[str, int]
+            Host and port to listen to.
+        baselines : BaselineStore
+        """
+        BaseHTTPServer.HTTPServer.__init__(self, address, ComparisonHandler)
+        self.baselines = baselines
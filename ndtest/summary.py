@@ -0,0 +1,123 @@
+import itertools
+import math
+
+# Default number of bins of the histograms of the percents, each covering 100 / BINS percent.
+BINS = 10
+
+# Default length (meters) of the segments along the pipeline over which the overlapped area is summed.
+SEGMENT_LENGTH = 100.
+
+
+class OverlapSummary(object):
+    """ Running aggregates of a collation, folded pair by pair by `Collator.summarize` instead of materializing an
+    `OverlapMetadata` for each overlapping pair.
+
+    It holds counts, the histograms of `percent_new` and `percent_old` and the overlapped area of each segment along
+    the pipeline, thus its size depends on the number of bins and on the length of the pipeline but not on the
+    number of boxes or pairs.
+    """
+
+    def __init__(self, bins=BINS, segment_length=SEGMENT_LENGTH):
+        """
+        Parameters
+        ----------
+        bins : int
+            Number of bins of the histograms of the percents.
+        segment_length : float
+            Length (meters) of the segments along x over which the overlapped area is summed.
+        """
+        self.bins = bins
+        self.segment_length = float(segment_length)
+        self.new_boxes = 0
+        self.unmatched_new = 0
+        self.pairs = 0
+        self.area = 0.
+        self.percent_new_histogram = [0] * bins
+        self.percent_old_histogram = [0] * bins
+        self.segment_areas = {}
+
+    def __repr__(self):
+        return '<%s [new_boxes=%s,unmatched_new=%s,pairs=%s]>' % (self.__class__.__name__, self.new_boxes,
+                                                                  self.unmatched_new, self.pairs)
+
+    def _bin(self, percent):
+        # A box fully covered falls in the last bin, along with any rounding above 100.
+        return max(0, min(int(percent * self.bins / 100.), self.bins - 1))
+
+    def add_new_box(self, matched):
+        """ Counts a box of the new inspection.
+
+        Parameters
+        ----------
+        matched : bool
+            Whether it overlaps at least one old box.
+        """
+        self.new_boxes += 1
+        if not matched:
+            self.unmatched_new += 1
+
+    def add_pair(self, old_box, new_box, area, percent_new, percent_old):
+        """ Folds an overlapping pair into the aggregates.
+        The overlapped area is spread over the segments covered by the x-extent shared by the boxes, since the
+        overlap has the same angular width all along it.
+
+        Parameters
+        ----------
+        old_box : PipeBox
+        new_box : PipeBox
+        area : float
+        percent_new : float
+        percent_old : float
+        """
+        self.pairs += 1
+        self.area += area
+        self.percent_new_histogram[self._bin(percent_new)] += 1
+        self.percent_old_histogram[self._bin(percent_old)] += 1
+
+        x_start, x_end = max(old_box.x, new_box.x), min(old_box.x + old_box.l, new_box.x + new_box.l)
+        density = area / (x_end - x_start)
+        segment_length, segment_areas = self.segment_length, self.segment_areas
+        first_segment = int(math.floor(x_start / segment_length))
+        last_segment = max(first_segment, int(math.ceil(x_end / segment_length)) - 1)
+        for segment in xrange(first_segment, last_segment + 1):
+            length = min(x_end, (segment + 1) * segment_length) - max(x_start, segment * segment_length)
+            segment_areas[segment] = segment_areas.get(segment, 0.) + density * length
+
+    def add(self, new_box, old_boxes, results):
+        """ Folds a box of the new inspection along with the results of `PipeBox.overlap_many` over its candidates.
+
+        Parameters
+        ----------
+        new_box : PipeBox
+        old_boxes : list[PipeBox]
+        results : list[tuple[float, float, float]]
+            For each of the old boxes either a tuple (area, percent_new, percent_old) or None.
+        """
+        matched = False
+        for old_box, result in itertools.izip(old_boxes, results):
+            if result is not None:
+                matched = True
+                self.add_pair(old_box, new_box, *result)
+        self.add_new_box(matched)
+
+    def histogram_edges(self):
+        """ Bounds of the bins of the histograms.
+
+        Returns
+        -------
+        list[tuple[float, float]]
+            Pairs (lower, upper) of percents.
+        """
+        width = 100. / self.bins
+        return [(i * width, (i + 1) * width) for i in range(self.bins)]
+
+    def segments(self):
+        """ Overlapped area of each segment along the pipeline which holds any.
+
+        Returns
+        -------
+        list[tuple[float, float, float]]
+            Triples (x_start, x_end, area) ordered along x.
+        """
+        return [(segment * self.segment_length, (segment + 1) * self.segment_length, area)
+                for segment, area in sorted(self.segment_areas.iteritems())]
@@ -4,6 +4,9 @@ setuptools.setup(
     name='ndtest',
     version='0.1.0',
     packages=['ndtest'],
+    extras_require={
+        'columnar': ['numpy'],
+    },
     entry_points={
         'console_scripts': [
             'ndtest = ndtest.__main__:main'
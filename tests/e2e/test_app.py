@@ -1,6 +1,9 @@
 import unittest
 import subprocess
+import json
 import os
+import shutil
+import tempfile
 
 
 class MggTestCase(unittest.TestCase):
@@ -12,3 +15,137 @@ class MggTestCase(unittest.TestCase):
         self.assertEqual(1, output.count("doesn't overlap"))
         self.assertEqual(8, output.count('overlaps 1'))
         self.assertEqual(5, output.count('overlaps 2'))
+
+    def test_ndtest_stream(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path])
+        stream_output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path, '--stream'])
+        self.assertEqual(output, stream_output)
+
+    def test_ndtest_stream__unsorted(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        directory = tempfile.mkdtemp()
+        try:
+            new_path = os.path.join(directory, 'new.csv')
+            with open(new_path, 'w') as new_file:
+                new_file.write('id\tx\tl\ta\tw\n1\t300\t10\t0\t10\n2\t10\t10\t0\t10\n')
+            output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path, '--stream'])
+        finally:
+            shutil.rmtree(directory)
+        self.assertIn('--stream argument requires inspections ordered by x and a', output)
+        self.assertIn('Unsorted data at row 2', output)
+
+    def test_ndtest_stream__invalid_arguments(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        for extra_args in (['--workers', '2'], ['--cache-dir', 'cache'], ['--engine', 'index'], ['--reverse']):
+            output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path, '--stream'] + extra_args)
+            self.assertIn('--stream argument', output)
+            self.assertNotIn('overlaps', output)
+        self.assertFalse(os.path.exists('cache'))
+
+    def test_ndtest_workers(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path])
+        workers_output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path, '--workers', '2'])
+        self.assertEqual(output, workers_output)
+
+    def test_ndtest_convert(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        directory = tempfile.mkdtemp()
+        try:
+            old_binary_path = os.path.join(directory, 'old.ndtb')
+            new_binary_path = os.path.join(directory, 'new.ndtb')
+            subprocess.check_call(['ndtest', 'convert', old_path, old_binary_path])
+            subprocess.check_call(['ndtest', 'convert', new_path, new_binary_path])
+            output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path])
+            binary_output = subprocess.check_output(['ndtest', '--old', old_binary_path, '--new', new_binary_path])
+            stream_output = subprocess.check_output(['ndtest', '--old', old_binary_path, '--new', new_binary_path,
+                                                     '--stream'])
+            columnar_outputs = []
+            for args in (['--format', 'jsonl'], ['--summary']):
+                columnar_outputs.append([
+                    subprocess.check_output(['ndtest', '--old', old, '--new', new, '--engine', 'columnar'] + args)
+                    for old, new in ((old_path, new_path), (old_binary_path, new_binary_path))])
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(output, binary_output)
+        self.assertEqual(output, stream_output)
+        for csv_output, columnar_binary_output in columnar_outputs:
+            self.assertEqual(csv_output, columnar_binary_output)
+
+    def test_ndtest_cache(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        directory = tempfile.mkdtemp()
+        try:
+            output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path])
+            for engine in ('index', 'index', 'sweep'):
+                cache_output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path,
+                                                        '--engine', engine, '--cache-dir', directory])
+                self.assertEqual(output, cache_output)
+            self.assertEqual(2, len(os.listdir(directory)))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_ndtest_output(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        directory = tempfile.mkdtemp()
+        try:
+            output_path = os.path.join(directory, 'report.txt')
+            output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path])
+            subprocess.check_call(['ndtest', '--old', old_path, '--new', new_path, '--output', output_path])
+            with open(output_path) as output_file:
+                self.assertEqual(output, output_file.read())
+        finally:
+            shutil.rmtree(directory)
+        self.assertNotIn('\x1b[', output)
+
+    def test_ndtest_format(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        for args in ([], ['--stream'], ['--workers', '2'], ['--engine', 'nested']):
+            output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path,
+                                              '--format', 'jsonl'] + args)
+            records = [json.loads(line) for line in output.splitlines()]
+            self.assertEqual(18, len(records))
+            self.assertEqual(13, len(set(record['id_new'] for record in records)))
+
+    def test_ndtest_stats(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        directory = tempfile.mkdtemp()
+        try:
+            profile_path = os.path.join(directory, 'ndtest.prof')
+            output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path])
+            process = subprocess.Popen(['ndtest', '--old', old_path, '--new', new_path, '--stats',
+                                        '--profile', profile_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            stats_output, stats = process.communicate()
+            self.assertTrue(os.path.getsize(profile_path))
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(output, stats_output)
+        for name in ('load', 'sort', 'analyze', 'output', 'candidate pairs', 'empty overlaps'):
+            self.assertIn(name, stats)
+
+    def test_ndtest_summary(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path, '--summary'])
+        self.assertIn('New boxes: 14', output)
+        self.assertIn("New boxes which don't overlap old boxes: 1", output)
+        self.assertIn('Overlapping pairs: 18', output)
+        stream_output = subprocess.check_output(['ndtest', '--old', old_path, '--new', new_path, '--summary',
+                                                 '--stream'])
+        self.assertEqual(output, stream_output)
+
+    def test_ndtest_series(self):
+        old_path = os.path.join('doc', 'inspection_data_old.csv')
+        new_path = os.path.join('doc', 'inspection_data_new.csv')
+        output = subprocess.check_output(['ndtest', 'series', old_path, new_path, new_path, '--all-pairs'])
+        self.assertIn('Track 1 found in 3 runs', output)
+        self.assertNotIn('\x1b[', output)
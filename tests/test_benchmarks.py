@@ -0,0 +1,84 @@
+from nose import tools as nt
+import json
+import os
+import shutil
+import tempfile
+
+from benchmarks import generator
+from benchmarks import run
+from ndtest import inspection
+from ndtest import loader
+
+
+class TestGenerator(object):
+
+    def test_generate_pair(self):
+        old_data, new_data = generator.generate_pair(2000, wrap_fraction=0.1, seed=3)
+
+        nt.assert_equal(2000, len(old_data))
+        nt.assert_almost_equal(0.1, generator.wrapped_fraction(old_data), delta=0.03)
+        nt.assert_greater(len(inspection.SweepCollator.analyze(old_data, new_data)), len(new_data) * 0.8)
+
+    def test_generate_pair__no_overlaps(self):
+        for wrap_fraction in (0.05, 0.1, 0.3):
+            for seed in range(5):
+                old_data, new_data = generator.generate_pair(1500, wrap_fraction=wrap_fraction, seed=seed)
+                for boxes in (old_data, new_data):
+                    nt.assert_equal(sorted(boxes, key=lambda b: (b.x, b.a)), boxes)
+                    # Boxes of the same inspection overlap only themselves.
+                    analysis = inspection.SweepCollator.analyze(boxes, boxes, lean=True)
+                    nt.assert_equal(len(boxes), len(analysis))
+                    for id_box, overlaps in analysis.iteritems():
+                        nt.assert_equal([id_box], overlaps.keys())
+
+    def test_generate_pair__uniform(self):
+        old_data, _ = generator.generate_pair(500, mean_length=1., length_distribution='uniform', seed=5)
+        nt.assert_true(all(0 < b.l <= 2. for b in old_data))
+
+    def test_generate_pair__seed(self):
+        nt.assert_equal(generator.generate_pair(100, seed=7), generator.generate_pair(100, seed=7))
+
+    @nt.raises(ValueError)
+    def test_generate_pair__distribution(self):
+        generator.generate_pair(10, length_distribution='normal')
+
+    def test_write(self):
+        directory = tempfile.mkdtemp()
+        try:
+            boxes, _ = generator.generate_pair(100, seed=11)
+            path = os.path.join(directory, 'boxes.csv')
+            generator.write(boxes, path)
+            nt.assert_equal(boxes, loader.load(path))
+        finally:
+            shutil.rmtree(directory)
+
+
+class TestRun(object):
+
+    def test_bench(self):
+        results = run.bench(200, ['nested', 'sweep'], repeat=1)
+
+        nt.assert_equal([('load', None), ('analyze', 'nested'), ('analyze', 'sweep'), ('output', None)],
+                        [(result['stage'], result['engine']) for result in results])
+        nt.assert_true(all(result['size'] == 200 and result['seconds'] >= 0 for result in results))
+
+    def test_compare(self):
+        baseline = [{'size': 10, 'stage': 'load', 'engine': None, 'seconds': 1.},
+                    {'size': 10, 'stage': 'analyze', 'engine': 'sweep', 'seconds': 1.}]
+        results = [{'size': 10, 'stage': 'load', 'engine': None, 'seconds': 1.2},
+                   {'size': 10, 'stage': 'analyze', 'engine': 'sweep', 'seconds': 1.3},
+                   {'size': 20, 'stage': 'load', 'engine': None, 'seconds': 5.}]
+
+        nt.assert_equal([(results[1], baseline[1])], run.compare(results, baseline, tolerance=0.25))
+
+    def test_main__record_compare(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'bench.json')
+            nt.assert_equal(0, run.main(['--sizes', '100', '--engines', 'sweep', '--repeat', '1', '--record', path]))
+            with open(path) as record_file:
+                nt.assert_equal(3, len(json.load(record_file)))
+            nt.assert_equal(0, run.main(['--sizes', '100', '--engines', 'sweep', '--repeat', '1',
+                                         '--compare', path, '--tolerance', '1000']))
+        finally:
+            shutil.rmtree(directory)
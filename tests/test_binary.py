@@ -0,0 +1,93 @@
+from nose import tools as nt
+import gc
+import mock
+import os
+import shutil
+import tempfile
+
+from ndtest import binary
+from ndtest import loader
+from ndtest import model
+
+
+class TestBinary(object):
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'inspection.ndtb')
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def _boxes(self):
+        return [model.PipeBox(3, 40, 10, 100, 20.5),
+                model.PipeBox(1, 10, 20, 50, 20),
+                model.PipeBox(2, 10, 20.25, 30, 350)]
+
+    def _keys(self, boxes):
+        return [(b.box_id, b.x, b.l, b.a, b.w) for b in boxes]
+
+    def test_dump_load(self):
+        binary.dump(self._boxes(), self.path)
+        boxes = binary.load(self.path)
+
+        nt.assert_equal([2, 1, 3], [b.box_id for b in boxes])
+        nt.assert_equal(self._keys(sorted(self._boxes(), key=lambda b: (b.x, b.a))), self._keys(boxes))
+
+    def test_header(self):
+        binary.dump(self._boxes(), self.path)
+        inspection = binary.BinaryInspection(self.path)
+
+        nt.assert_equal(3, len(inspection))
+        nt.assert_true(inspection.sorted)
+        nt.assert_equal(10, inspection.x_min)
+        nt.assert_equal(50, inspection.x_max)
+        nt.assert_equal([10, 10, 40], list(inspection.column('x')))
+        nt.assert_equal([2, 1, 3], list(inspection.column('id')))
+        inspection.close()
+
+    def test_dump_load_empty(self):
+        binary.dump([], self.path)
+        nt.assert_equal([], binary.load(self.path))
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as binary_file:
+            binary_file.write('id\tx\tl\ta\tw\n' * 10)
+        with nt.assert_raises_regexp(binary.BinaryFormatException, 'Invalid binary inspection'):
+            binary.BinaryInspection(self.path)
+
+    def test_truncated_file(self):
+        binary.dump(self._boxes(), self.path)
+        with open(self.path, 'r+b') as binary_file:
+            binary_file.truncate(binary.HEADER_SIZE + 10)
+        with nt.assert_raises_regexp(binary.BinaryFormatException, 'truncated columns'):
+            binary.BinaryInspection(self.path)
+
+    def test_loader_load(self):
+        binary.dump(self._boxes(), self.path)
+        nt.assert_equal(self._keys(binary.load(self.path)), self._keys(loader.load(self.path)))
+
+    def test_loader_load__gc_disabled(self):
+        binary.dump(self._boxes(), self.path)
+        load = binary.load
+        with mock.patch('ndtest.binary.load', side_effect=lambda path: (gc.isenabled(), load(path))):
+            gc_enabled, boxes = loader.load(self.path)
+        nt.assert_false(gc_enabled)
+        nt.assert_true(gc.isenabled())
+        nt.assert_equal(3, len(boxes))
+
+    def test_iter_boxes(self):
+        binary.dump(self._boxes(), self.path)
+        inspection = binary.BinaryInspection(self.path)
+        try:
+            for block_size in (1, 2, 100):
+                nt.assert_equal(self._keys(binary.load(self.path)), self._keys(inspection.iter_boxes(block_size)))
+        finally:
+            inspection.close()
+
+    def test_loader_stream(self):
+        binary.dump(self._boxes(), self.path)
+        expected = self._keys(binary.load(self.path))
+        nt.assert_equal(expected, self._keys(loader.iter_load(self.path)))
+        nt.assert_equal(expected, self._keys(loader.stream(self.path)))
+        nt.assert_equal(expected, self._keys(loader.external_sort(self.path, chunk_size=2)))
@@ -0,0 +1,87 @@
+from nose import tools as nt
+import gc
+import mock
+import os
+import shutil
+import tempfile
+
+from ndtest import binary
+from ndtest import cache
+from ndtest import index
+
+
+class TestBaselineCache(object):
+
+    CSV_TEXT = 'id\tx\tl\ta\tw\n1\t20\t50\t30\t60\n2\t10\t50\t180\t60\n3\t40\t50\t300\t70\n'
+
+    def setup(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.csv_path = self._write('inspection.csv', self.CSV_TEXT)
+
+    def teardown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as csv_file:
+            csv_file.write(text)
+        return path
+
+    def _keys(self, boxes):
+        return [(b.box_id, b.x, b.l, b.a, b.w) for b in boxes]
+
+    def test_key(self):
+        baseline_cache = cache.BaselineCache(self.cache_dir)
+        other_path = self._write('other.csv', self.CSV_TEXT)
+        changed_path = self._write('changed.csv', self.CSV_TEXT.replace('300', '301'))
+
+        nt.assert_equal(baseline_cache.key(self.csv_path), baseline_cache.key(other_path))
+        nt.assert_not_equal(baseline_cache.key(self.csv_path), baseline_cache.key(changed_path))
+        key = baseline_cache.key(self.csv_path)
+        with mock.patch('ndtest.loader.CSV_HEADER', ['id', 'x', 'l', 'a', 'w', 'depth']):
+            nt.assert_not_equal(key, baseline_cache.key(self.csv_path))
+
+    def test_load(self):
+        baseline_cache = cache.BaselineCache(self.cache_dir)
+        boxes = baseline_cache.load(self.csv_path)
+
+        nt.assert_equal([2, 1, 3], [b.box_id for b in boxes])
+        nt.assert_equal(1, len(os.listdir(self.cache_dir)))
+        with mock.patch('ndtest.loader.load') as load_mock:
+            nt.assert_equal(self._keys(boxes), self._keys(baseline_cache.load(self.csv_path)))
+            nt.assert_false(load_mock.called)
+        load = binary.load
+        with mock.patch('ndtest.binary.load', side_effect=lambda path: (gc.isenabled(), load(path))):
+            gc_enabled, cached_boxes = baseline_cache.load(self.csv_path)
+        nt.assert_false(gc_enabled)
+        nt.assert_true(gc.isenabled())
+        nt.assert_equal(self._keys(boxes), self._keys(cached_boxes))
+
+    def test_load_index(self):
+        baseline_cache = cache.BaselineCache(self.cache_dir)
+        box_index = baseline_cache.load_index(self.csv_path)
+
+        nt.assert_is_instance(box_index, index.BoxIndex)
+        nt.assert_equal(2, len(os.listdir(self.cache_dir)))
+        with mock.patch.object(index.BoxIndex, '_build') as build_mock:
+            cached_index = baseline_cache.load_index(self.csv_path)
+            nt.assert_false(build_mock.called)
+        nt.assert_equal(self._keys(box_index.boxes), self._keys(cached_index.boxes))
+        nt.assert_equal([1, 3], sorted(b.box_id for b in cached_index.query_region(65, 1, 0, 360)))
+
+    def test_evict(self):
+        baseline_cache = cache.BaselineCache(self.cache_dir)
+        baseline_cache.load(self.csv_path)
+        size = os.path.getsize(os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0]))
+        baseline_cache.max_size = size * 2
+
+        first_path = self._write('first.csv', self.CSV_TEXT.replace('300', '301'))
+        second_path = self._write('second.csv', self.CSV_TEXT.replace('300', '302'))
+        baseline_cache.load(first_path)
+        oldest = os.path.join(self.cache_dir, baseline_cache.key(self.csv_path) + '.ndtb')
+        os.utime(oldest, (0, 0))
+        baseline_cache.load(second_path)
+
+        nt.assert_equal(2, len(os.listdir(self.cache_dir)))
+        nt.assert_false(os.path.exists(oldest))
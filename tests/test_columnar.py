@@ -0,0 +1,71 @@
+from nose import SkipTest
+from nose import tools as nt
+import os
+import shutil
+import tempfile
+
+from ndtest import binary
+from ndtest import columnar
+from ndtest import model
+
+
+class TestColumns(object):
+
+    def setup(self):
+        if columnar.numpy is None:
+            raise SkipTest('numpy is not installed')
+
+    def test_from_boxes(self):
+        boxes = [model.PipeBox(1, 10, 20, 30, 40), model.PipeBox(2, 50, 60, 300, 100)]
+        columns = columnar.Columns.from_boxes(boxes)
+
+        nt.assert_equal(2, len(columns))
+        nt.assert_equal([1, 2], columns.ids.tolist())
+        nt.assert_equal([10, 50], columns.x.tolist())
+        nt.assert_is(boxes, columns.boxes)
+        nt.assert_equal([boxes[0].area(), boxes[1].area()], columns.area.tolist())
+
+    def test_from_binary(self):
+        boxes = [model.PipeBox(1, 10, 20, 30, 40), model.PipeBox(2, 50, 60, 300, 100)]
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'inspection.ndtb')
+            binary.dump(boxes, path)
+            inspection = binary.BinaryInspection(path)
+            columns = columnar.Columns.from_binary(inspection)
+
+            nt.assert_equal([1, 2], columns.ids.tolist())
+            nt.assert_equal([300, 100], [columns.a[1], columns.w[1]])
+            nt.assert_equal(columns.area.tolist(), columnar.Columns.from_boxes(boxes).area.tolist())
+            del columns
+            inspection.close()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_regions(self):
+        boxes = [model.PipeBox(1, 10, 20, 30, 40), model.PipeBox(2, 50, 60, 300, 100)]
+        columns = columnar.Columns.from_boxes(boxes)
+
+        for i, box in enumerate(boxes):
+            regions = [(a[i], w[i]) for a, w in zip(columns.region_a, columns.region_w) if w[i]]
+            nt.assert_equal([(r.a, r.w) for r in box.plain_regions], regions)
+
+    def test_overlaps(self):
+        old_boxes = [model.PipeBox(1, 270, 100, 200, 320), model.PipeBox(2, 400, 10, 0, 10)]
+        new_boxes = [model.PipeBox(1, 320, 100, 20, 40), model.PipeBox(2, 320, 10, 160, 40)]
+        old, new = columnar.Columns.from_boxes(old_boxes), columnar.Columns.from_boxes(new_boxes)
+
+        chunks = list(columnar.overlaps(old, new, chunk_size=1))
+
+        nt.assert_equal(1, len(chunks))
+        old_index, new_index, area, percent_old, percent_new = chunks[0]
+        nt.assert_equal([0], old_index.tolist())
+        nt.assert_equal([0], new_index.tolist())
+        nt.assert_almost_equal(old_boxes[0].overlap(new_boxes[0])[0].area(), area[0])
+        nt.assert_almost_equal(float(50 * 40) / float(100 * 320) * 100, percent_old[0])
+        nt.assert_almost_equal(float(50 * 40) / float(100 * 40) * 100, percent_new[0])
+
+    def test_overlaps__empty_old(self):
+        old = columnar.Columns.from_boxes([])
+        new = columnar.Columns.from_boxes([model.PipeBox(1, 320, 100, 20, 40)])
+        nt.assert_equal([], list(columnar.overlaps(old, new)))
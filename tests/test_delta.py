@@ -0,0 +1,65 @@
+from nose import tools as nt
+import random
+
+from ndtest import delta
+from ndtest import index
+from ndtest import inspection
+from ndtest import model
+from tests.test_inspection import flatten, random_boxes
+
+
+def revise(rnd, new_data):
+    """ Returns a revision of new_data with some boxes moved, some removed and some added. """
+    revised_data = []
+    for box in new_data:
+        if box.box_id % 10 == 1:
+            continue
+        if box.box_id % 10 == 2:
+            box = model.PipeBox(box.box_id, box.x + rnd.randint(1, 5), box.l, box.a, box.w)
+        revised_data.append(box)
+    revised_data.extend(random_boxes(rnd, 5, first_id=1000))
+    revised_data.sort(key=lambda b: (b.x, b.a))
+    return revised_data
+
+
+class TestDelta(object):
+
+    def test_diff(self):
+        previous_data = [model.PipeBox(1, 0, 1, 0, 10), model.PipeBox(2, 5, 1, 0, 10), model.PipeBox(3, 9, 1, 0, 10)]
+        revised_data = [model.PipeBox(1, 0, 1, 0, 10), model.PipeBox(3, 9, 2, 0, 10), model.PipeBox(4, 9, 1, 0, 10)]
+
+        box_diff = delta.diff(previous_data, revised_data)
+
+        nt.assert_equal([revised_data[2]], box_diff.added)
+        nt.assert_equal([revised_data[1]], box_diff.changed)
+        nt.assert_equal({2}, box_diff.removed)
+        nt.assert_equal({2, 3}, box_diff.stale_ids)
+        nt.assert_equal([revised_data[2], revised_data[1]], box_diff.boxes)
+        nt.assert_equal(3, len(box_diff))
+        nt.assert_equal(0, len(delta.diff(previous_data, previous_data)))
+
+    def test_patch(self):
+        rnd = random.Random(41)
+        old_data, new_data = random_boxes(rnd, 200), random_boxes(rnd, 200)
+        revised_data = revise(rnd, new_data)
+        expected = flatten(inspection.Collator.analyze(old_data, revised_data))
+        box_diff = delta.diff(new_data, revised_data)
+
+        data = inspection.SweepCollator.analyze(old_data, new_data)
+        nt.assert_equal(expected, flatten(delta.patch(data, box_diff, old_data)))
+        nt.assert_equal(expected, flatten(data))
+
+        data = inspection.SweepCollator.collate(old_data, new_data)
+        patched = delta.patch(data, box_diff, index.BoxIndex(old_data))
+        nt.assert_is_instance(patched, inspection.OverlapStore)
+        nt.assert_equal(expected, flatten(patched.forward()))
+
+    def test_patch__lean(self):
+        rnd = random.Random(43)
+        old_data, new_data = random_boxes(rnd, 100), random_boxes(rnd, 100)
+        revised_data = revise(rnd, new_data)
+
+        data = delta.patch(inspection.Collator.analyze(old_data, new_data, lean=True),
+                           delta.diff(new_data, revised_data), old_data, lean=True)
+
+        nt.assert_equal(flatten(inspection.Collator.analyze(old_data, revised_data)), flatten(data))
@@ -0,0 +1,77 @@
+from nose import tools as nt
+import random
+
+from ndtest import index
+from ndtest import model
+
+
+class TestBoxIndex(object):
+
+    INDEX = index.BoxIndex
+
+    def _boxes(self):
+        return [model.PipeBox(1, 10, 40, 0, 20),
+                model.PipeBox(2, 20, 100, 300, 100),  # Wrapped around 0/360 degrees
+                model.PipeBox(3, 50, 10, 100, 50),
+                model.PipeBox(4, 200, 30, 10, 340)]
+
+    def _ids(self, boxes):
+        return sorted(box.box_id for box in boxes)
+
+    def test_len(self):
+        nt.assert_equal(4, len(self.INDEX(self._boxes())))
+
+    def test_query__empty(self):
+        box_index = self.INDEX(self._boxes())
+        nt.assert_equal([], box_index.query(model.PipeBox(None, 130, 60, 0, 360)))
+        nt.assert_equal([], self.INDEX([]).query(model.PipeBox(None, 10, 10, 0, 360)))
+
+    def test_query__touching_is_not_overlapping(self):
+        box_index = self.INDEX(self._boxes())
+        nt.assert_equal([], box_index.query(model.PipeBox(None, 60, 10, 100, 50)))
+        nt.assert_equal([], box_index.query(model.PipeBox(None, 50, 10, 150, 50)))
+
+    def test_query__seam(self):
+        box_index = self.INDEX(self._boxes())
+        nt.assert_equal([1, 2], self._ids(box_index.query(model.PipeBox(None, 25, 5, 350, 20))))
+        nt.assert_equal([2], self._ids(box_index.query(model.PipeBox(None, 100, 5, 350, 20))))
+
+    def test_query__wrapped_box_is_returned_once(self):
+        box_index = self.INDEX(self._boxes())
+        nt.assert_equal([2], self._ids(box_index.query(model.PipeBox(None, 60, 10, 200, 200))))
+
+    def test_query_region(self):
+        box_index = self.INDEX(self._boxes())
+        nt.assert_equal([1, 2, 3], self._ids(box_index.query_region(0, 120, 0, 360)))
+        nt.assert_equal([4], self._ids(box_index.query_region(210, 1, 100, 1)))
+
+    def test_query__long_box_before_short_ones(self):
+        boxes = [model.PipeBox(1, 0, 1000, 0, 10)]
+        boxes.extend(model.PipeBox(i, i * 10, 5, 20, 10) for i in range(2, 50))
+        box_index = self.INDEX(boxes)
+        nt.assert_equal([1], self._ids(box_index.query_region(900, 1, 5, 1)))
+
+
+class TestGridIndex(TestBoxIndex):
+
+    INDEX = index.GridIndex
+
+    def test_query__random(self):
+        rnd = random.Random(53)
+        boxes = [model.PipeBox(i, rnd.uniform(0, 100), rnd.uniform(0.1, 20), rnd.uniform(0, 359), rnd.uniform(1, 90))
+                 for i in range(300)]
+        for box_index in (self.INDEX(boxes), self.INDEX(boxes, cell_length=0.5, sectors=7),
+                          self.INDEX(boxes, cell_length=1000, sectors=1)):
+            for _ in range(100):
+                box = model.PipeBox(None, rnd.uniform(-10, 110), rnd.uniform(0.1, 30), rnd.uniform(0, 359),
+                                    rnd.uniform(1, 360))
+                expected = [b.box_id for b in boxes if b.overlap(box)]
+                nt.assert_equal(sorted(expected), self._ids(box_index.query(box)))
+
+    def test_cells(self):
+        box_index = self.INDEX(self._boxes(), cell_length=10, sectors=4)
+        nt.assert_equal(10, box_index.cell_length)
+        # The wrapped box 2 is registered in the last sector and in the first one.
+        nt.assert_equal([1, 2], self._ids(entry[-1] for entry in box_index._cells_map[(2, 0)]))
+        nt.assert_equal([2], self._ids(entry[-1] for entry in box_index._cells_map[(2, 3)]))
+        nt.assert_not_in((2, 2), box_index._cells_map)
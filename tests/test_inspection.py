@@ -1,23 +1,103 @@
+from nose import SkipTest
 from nose import tools as nt
+import os
+import random
+import shutil
+import tempfile
 
+from ndtest import binary
 from ndtest import model
+from ndtest import columnar
+from ndtest import index
 from ndtest import inspection
+from ndtest import loader
+from ndtest import output
+
+
+def random_boxes(rnd, count, first_id=1):
+    boxes = [model.PipeBox(first_id + i, rnd.randint(0, 500), rnd.randint(1, 80), rnd.randint(0, 359),
+                           rnd.randint(1, 360)) for i in range(count)]
+    boxes.sort(key=lambda b: (b.x, b.a))
+    return boxes
+
+
+def flatten(data):
+    return {(id_new, id_old): (m.percent_new, m.percent_old, m.overlaps)
+            for id_new in data for id_old, m in data[id_new].items()}
 
 
 class TestOverlapMetadata(object):
 
+    def test_area(self):
+        overlaps = [model.BoundBox(20, 10, 0, 20), model.BoundBox(20, 10, 300, 60)]
+        metadata = inspection.OverlapMetadata(1, 2, overlaps, 25, 33.2)
+        nt.assert_almost_equal(overlaps[0].area() + overlaps[1].area(), metadata.area)
+        nt.assert_equal(3.5, inspection.OverlapMetadata(1, 2, overlaps, 25, 33.2, 3.5).area)
+
+    def test_lean(self):
+        old_box, new_box = model.PipeBox(1, 20, 10, 300, 80), model.PipeBox(2, 25, 10, 0, 40)
+        metadata = inspection.LeanOverlapMetadata(old_box, new_box, 25, 50, 1.5)
+
+        nt.assert_equal((1, 2, 25, 50, 1.5),
+                        (metadata.id_old, metadata.id_new, metadata.percent_old, metadata.percent_new, metadata.area))
+        nt.assert_equal([model.BoundBox(25, 5, 0, 20)], metadata.overlaps)
+        nt.assert_equal("<LeanOverlapMetadata [id_old=1,id_new=2,percent_old=25,percent_new=50]>", repr(metadata))
+
     def test__repr__(self):
         metadata = inspection.OverlapMetadata(1, 2, [], 25, 33.2)
         nt.assert_equal("<OverlapMetadata [id_old=1,id_new=2,percent_old=25,percent_new=33.2]>", repr(metadata))
 
 
+class TestOverlapStore(object):
+
+    def _as_dict(self, groups):
+        return {key: dict(groups[key]) for key in groups}
+
+    def test_views(self):
+        rnd = random.Random(37)
+        old_data, new_data = random_boxes(rnd, 60), random_boxes(rnd, 60)
+        data = inspection.Collator.analyze(old_data, new_data)
+
+        store = inspection.Collator.collate(old_data, new_data)
+
+        nt.assert_equal(sum(len(overlaps) for overlaps in data.values()), len(store))
+        nt.assert_equal(sorted(data), list(store.forward()))
+        nt.assert_equal(len(data), len(store.forward()))
+        nt.assert_equal(flatten(data), flatten(self._as_dict(store.forward())))
+        reverse = output.reverse_data(data)
+        nt.assert_equal(sorted(reverse), list(store.reverse()))
+        nt.assert_equal(flatten(reverse), flatten(self._as_dict(store.reverse())))
+
+    def test_views_share_metadata(self):
+        old_boxes = [model.PipeBox(1, 20, 20, 30, 20), model.PipeBox(2, 20, 20, 60, 20)]
+        new_boxes = [model.PipeBox(7, 20, 20, 40, 30)]
+
+        store = inspection.SweepCollator.collate(old_boxes, new_boxes)
+
+        nt.assert_in(7, store.forward())
+        nt.assert_not_in(1, store.forward())
+        nt.assert_equal([1, 2], sorted(store.forward()[7]))
+        nt.assert_is(store.forward()[7][2], store.reverse()[2][7])
+        nt.assert_equal({}, store.reverse().get(3, {}))
+        with nt.assert_raises(KeyError):
+            store.reverse()[7]
+
+    def test_empty(self):
+        store = inspection.OverlapStore([])
+        nt.assert_equal(0, len(store))
+        nt.assert_equal([], list(store.forward()))
+        nt.assert_not_in(1, store.reverse())
+
+
 class TestInspectionsCollator(object):
 
+    COLLATOR = inspection.Collator
+
     def test_analyze__old_after_new_along_a__empty(self):
         old_boxes = [model.PipeBox(1, 20, 20, 30, 20)]
         new_boxes = [model.PipeBox(1, 20, 20, 10, 20)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(0, len(data))
 
@@ -25,7 +105,7 @@ class TestInspectionsCollator(object):
         old_boxes = [model.PipeBox(1, 20, 20, 10, 20)]
         new_boxes = [model.PipeBox(1, 20, 20, 30, 20)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(0, len(data))
 
@@ -33,7 +113,7 @@ class TestInspectionsCollator(object):
         old_boxes = [model.PipeBox(1, 50, 40, 10, 20)]
         new_boxes = [model.PipeBox(1, 10, 40, 0, 20)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(0, len(data))
 
@@ -41,7 +121,7 @@ class TestInspectionsCollator(object):
         old_boxes = [model.PipeBox(1, 10, 40, 0, 20)]
         new_boxes = [model.PipeBox(1, 50, 40, 10, 20)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(0, len(data))
 
@@ -49,7 +129,7 @@ class TestInspectionsCollator(object):
         old_boxes = [model.PipeBox(1, 270, 100, 200, 320)]
         new_boxes = [model.PipeBox(1, 320, 100, 20, 40)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(1, len(data))
         nt.assert_in(1, data)
@@ -66,7 +146,7 @@ class TestInspectionsCollator(object):
         new_boxes = [model.PipeBox(1, 270, 100, 200, 320)]
         old_boxes = [model.PipeBox(1, 320, 100, 20, 40)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(1, len(data))
         nt.assert_in(1, data)
@@ -83,7 +163,7 @@ class TestInspectionsCollator(object):
         old_boxes = [model.PipeBox(1, 270, 100, 200, 320)]
         new_boxes = [model.PipeBox(1, 320, 100, 260, 40)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(1, len(data))
         nt.assert_in(1, data)
@@ -100,7 +180,7 @@ class TestInspectionsCollator(object):
         old_boxes = [model.PipeBox(1, 320, 100, 260, 40)]
         new_boxes = [model.PipeBox(1, 270, 100, 200, 320)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(1, len(data))
         nt.assert_in(1, data)
@@ -117,7 +197,7 @@ class TestInspectionsCollator(object):
         old_boxes = [model.PipeBox(1, 270, 100, 200, 320)]
         new_boxes = [model.PipeBox(1, 320, 100, 160, 40)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(0, len(data))
 
@@ -125,6 +205,170 @@ class TestInspectionsCollator(object):
         old_boxes = [model.PipeBox(1, 320, 100, 160, 40)]
         new_boxes = [model.PipeBox(1, 270, 100, 200, 320)]
 
-        data = inspection.Collator.analyze(old_boxes, new_boxes)
+        data = self.COLLATOR.analyze(old_boxes, new_boxes)
 
         nt.assert_equal(0, len(data))
+
+
+class TestSweepCollator(TestInspectionsCollator):
+
+    COLLATOR = inspection.SweepCollator
+
+    def test_analyze__same_as_collator__inspection_data(self):
+        old_data = loader.load(os.path.join('doc', 'inspection_data_old.csv'))
+        new_data = loader.load(os.path.join('doc', 'inspection_data_new.csv'))
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        data = self.COLLATOR.analyze(old_data, new_data)
+
+        nt.assert_equal(flatten(expected), flatten(data))
+
+    def test_analyze__same_as_collator__random(self):
+        rnd = random.Random(7)
+        for _ in range(20):
+            old_data, new_data = random_boxes(rnd, 60), random_boxes(rnd, 60)
+
+            expected = inspection.Collator.analyze(old_data, new_data)
+            data = self.COLLATOR.analyze(old_data, new_data)
+
+            nt.assert_true(expected)
+            nt.assert_equal(flatten(expected), flatten(data))
+
+    def test_analyze__metadata_ids(self):
+        old_boxes = [model.PipeBox(1, 20, 20, 30, 20)]
+        new_boxes = [model.PipeBox(2, 20, 20, 40, 20)]
+
+        metadata = self.COLLATOR.analyze(old_boxes, new_boxes)[2][1]
+
+        nt.assert_equal(1, metadata.id_old)
+        nt.assert_equal(2, metadata.id_new)
+
+    def test_iter_groups__iterators(self):
+        rnd = random.Random(19)
+        old_data, new_data = random_boxes(rnd, 60), random_boxes(rnd, 60)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        groups = list(self.COLLATOR.iter_groups(iter(old_data), iter(new_data)))
+
+        nt.assert_equal([b.box_id for b in new_data], [new_box.box_id for new_box, _ in groups])
+        for new_box, overlaps in groups:
+            nt.assert_equal(sorted(expected.get(new_box.box_id, {})), sorted(b.box_id for b, _ in overlaps))
+            for old_box, metadata in overlaps:
+                nt.assert_equal(old_box.box_id, metadata.id_old)
+                nt.assert_equal(new_box.box_id, metadata.id_new)
+
+    def test_iter_analyze(self):
+        rnd = random.Random(23)
+        old_data, new_data = random_boxes(rnd, 60), random_boxes(rnd, 60)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        metadata = list(self.COLLATOR.iter_analyze(iter(old_data), iter(new_data)))
+
+        nt.assert_equal(sorted((id_new, id_old) for id_new in expected for id_old in expected[id_new]),
+                        sorted((m.id_new, m.id_old) for m in metadata))
+
+    def test_analyze__lean(self):
+        rnd = random.Random(41)
+        old_data, new_data = random_boxes(rnd, 60), random_boxes(rnd, 60)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        data = self.COLLATOR.analyze(old_data, new_data, lean=True)
+
+        nt.assert_equal(flatten(expected), flatten(data))
+        for id_new in data:
+            for id_old, metadata in data[id_new].items():
+                nt.assert_is_instance(metadata, inspection.LeanOverlapMetadata)
+                nt.assert_false(hasattr(metadata, '__dict__'))
+                nt.assert_equal((id_old, id_new), (metadata.id_old, metadata.id_new))
+                nt.assert_equal(expected[id_new][id_old].area, metadata.area)
+
+
+class TestIndexCollator(TestSweepCollator):
+
+    COLLATOR = inspection.IndexCollator
+
+    def test_analyze__prebuilt_index(self):
+        rnd = random.Random(11)
+        old_data, new_data = random_boxes(rnd, 60), random_boxes(rnd, 60)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        data = self.COLLATOR.analyze(index.BoxIndex(old_data), new_data)
+
+        nt.assert_equal(flatten(expected), flatten(data))
+
+
+class TestGridCollator(TestIndexCollator):
+
+    COLLATOR = inspection.GridCollator
+
+    def test_analyze__prebuilt_grid_index(self):
+        rnd = random.Random(19)
+        old_data, new_data = random_boxes(rnd, 60), random_boxes(rnd, 60)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        data = self.COLLATOR.analyze(index.GridIndex(old_data, cell_length=5, sectors=12), new_data)
+
+        nt.assert_equal(flatten(expected), flatten(data))
+
+
+class TestColumnarCollator(TestSweepCollator):
+
+    COLLATOR = inspection.ColumnarCollator
+
+    def setup(self):
+        if columnar.numpy is None:
+            raise SkipTest('numpy is not installed')
+
+    def test_analyze__exact_percents(self):
+        rnd = random.Random(13)
+        old_data, new_data = random_boxes(rnd, 80), random_boxes(rnd, 80)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        data = self.COLLATOR.analyze(old_data, new_data)
+
+        for id_new in expected:
+            for id_old in expected[id_new]:
+                nt.assert_equal(expected[id_new][id_old].percent_new, data[id_new][id_old].percent_new)
+                nt.assert_equal(expected[id_new][id_old].percent_old, data[id_new][id_old].percent_old)
+
+    def test_candidates(self):
+        rnd = random.Random(17)
+        old_data, new_data = random_boxes(rnd, 40), random_boxes(rnd, 40)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        candidates = {new_box.box_id: sorted(b.box_id for b in old_boxes)
+                      for new_box, old_boxes in self.COLLATOR._candidates(old_data, new_data)}
+
+        nt.assert_equal(sorted(b.box_id for b in new_data), sorted(candidates))
+        for new_box in new_data:
+            nt.assert_equal(sorted(expected.get(new_box.box_id, {})), candidates[new_box.box_id])
+
+    def test_binary(self):
+        rnd = random.Random(19)
+        old_data, new_data = random_boxes(rnd, 60), random_boxes(rnd, 60, first_id=100)
+        # Boxes far from the others overlap none.
+        old_data.append(model.PipeBox(61, 1000, 10, 0, 10))
+        new_data.append(model.PipeBox(161, 2000, 10, 0, 10))
+        directory = tempfile.mkdtemp()
+        try:
+            old_path, new_path = os.path.join(directory, 'old.ndtb'), os.path.join(directory, 'new.ndtb')
+            binary.dump(old_data, old_path)
+            binary.dump(new_data, new_path)
+            old_binary, new_binary = binary.BinaryInspection(old_path), binary.BinaryInspection(new_path)
+
+            expected = inspection.Collator.analyze(old_data, new_data)
+            nt.assert_equal(flatten(expected), flatten(self.COLLATOR.analyze(old_binary, new_binary)))
+            lean = self.COLLATOR.analyze(old_binary, new_binary, lean=True)
+            nt.assert_equal(flatten(inspection.Collator.analyze(old_data, new_data, lean=True)), flatten(lean))
+            nt.assert_equal(self.COLLATOR.summarize(old_data, new_data).segment_areas,
+                            self.COLLATOR.summarize(old_binary, new_binary).segment_areas)
+
+            old, new = columnar.Columns.from_data(old_binary), columnar.Columns.from_data(new_binary)
+            list(self.COLLATOR._hits(old, new))
+            nt.assert_equal({}, old._made_boxes)
+            pairs = list(self.COLLATOR.iter_analyze(old, new))
+            # Only the boxes of the overlapping pairs are made.
+            nt.assert_equal(len(set(metadata.id_old for metadata in pairs)), len(old._made_boxes))
+            nt.assert_less(len(old._made_boxes), len(old_data))
+        finally:
+            shutil.rmtree(directory)
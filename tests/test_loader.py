@@ -1,9 +1,11 @@
 from nose import tools as nt
 import mock
 import cStringIO
+import gc
 
 from ndtest import loader
 from ndtest import model
+from ndtest import profiling
 
 
 class TestLoader(object):
@@ -63,3 +65,164 @@ class TestLoader(object):
                 loader.load(self.CSV_PATH_MOCK)
             open_mock.assert_called_once()
             nt.assert_equal(mock.call(self.CSV_PATH_MOCK), open_mock.call_args)
+
+    def _parse_blocks(self, text, block_size):
+        return [box for boxes in loader._parse_blocks(cStringIO.StringIO(text), block_size) for box in boxes]
+
+    def test_parse_blocks(self):
+        rows = [[i, i * 0.5, 1.25, (i * 37) % 360, 20] for i in range(1, 50)]
+        text = self._csv_text(rows)
+        expected = self._keys(loader._parse(cStringIO.StringIO(text)))
+        for block_size in (1, 7, 64, 4096):
+            nt.assert_equal(expected, self._keys(self._parse_blocks(text, block_size)))
+            nt.assert_equal(expected, self._keys(self._parse_blocks(text + '\n', block_size)))
+            nt.assert_equal(expected, self._keys(self._parse_blocks(text.replace('\n', '\r\n'), block_size)))
+        nt.assert_equal([], self._parse_blocks('', 16))
+
+    def test_parse_blocks_quoted(self):
+        text = self._csv_text([[1, 10, 20, 50, 20.0], ['"2"', 10, 20, 55, 20]])
+        nt.assert_equal([(1, 10, 20, 50, 20), (2, 10, 20, 55, 20)], self._keys(self._parse_blocks(text, 1024)))
+
+    def test_parse_blocks_invalid_row(self):
+        text = self._csv_text([[i, i, 1, 0, 10] for i in range(1, 30)] + [[30, 10, 'XXX', 50, 20.0]])
+        for block_size in (16, 4096):
+            with nt.assert_raises_regexp(loader.DataLoaderException, 'Invalid data at row 30. Columns must be numbers'):
+                self._parse_blocks(text, block_size)
+        with nt.assert_raises_regexp(loader.DataLoaderException, 'Invalid header. Expected '):
+            self._parse_blocks(self._csv_text([], header=('id', 'x')), 16)
+
+    def test_parse_strict(self):
+        text = self._csv_text([[i, i, 1, 0, 10] for i in range(1, 30)] + [[30, 10, 0, 50, 20], [31, 10, 1, 50, 0]])
+        nt.assert_equal(31, len(loader.parse(cStringIO.StringIO(text))))
+        with nt.assert_raises_regexp(loader.DataLoaderException, 'Invalid data at row 30. Length and width must be '):
+            loader.parse(cStringIO.StringIO(text), strict=True)
+
+    def test_parse_blocks_misaligned_rows(self):
+        # The fields of the two rows add up to two boxes, though neither row is made of 5 fields.
+        text = 'id\tx\tl\ta\tw\n1\t2\t3\t4\n5\t6\t7\t8\t9\t10\n'
+        for block_size in (4, 4096):
+            with nt.assert_raises_regexp(loader.DataLoaderException, 'Invalid data at row 1. Expected 5 columns got 4'):
+                self._parse_blocks(text, block_size)
+        with nt.assert_raises_regexp(loader.DataLoaderException, 'Invalid data at row 2. Expected 5 columns got 0'):
+            self._parse_blocks(self._csv_text([[1, 10, 20, 50, 20], [], [2, 10, 20, 55, 20]]), 4096)
+        with nt.assert_raises_regexp(loader.DataLoaderException, 'Invalid data at row 1. Expected 5 columns got 4'):
+            list(loader._parse(cStringIO.StringIO(text)))
+
+    def _ordered_ids(self, boxes):
+        return [b.box_id for b in sorted(boxes, key=lambda b: (b.x, b.a))]
+
+    def test_order_presorted(self):
+        boxes = [model.PipeBox(i, i // 3, 1, i % 3, 1) for i in range(100)]
+        ordered, path_taken, stragglers = loader.order(boxes)
+        nt.assert_is(boxes, ordered)
+        nt.assert_equal((loader.PRESORTED, 0), (path_taken, stragglers))
+
+    def test_order_repaired(self):
+        boxes = [model.PipeBox(i, i // 2, 1, 0, 1) for i in range(100)]
+        # A box moved ahead, a box moved behind and a run of boxes moved ahead, with ties along the way.
+        boxes.insert(10, boxes.pop(30))
+        boxes.insert(80, boxes.pop(50))
+        boxes[60:60] = [boxes.pop(20), boxes.pop(20), boxes.pop(20)]
+        ordered, path_taken, stragglers = loader.order(list(boxes))
+        nt.assert_equal(self._ordered_ids(boxes), [b.box_id for b in ordered])
+        nt.assert_equal(loader.REPAIRED, path_taken)
+        nt.assert_equal(5, stragglers)
+
+    def test_order_sorted(self):
+        boxes = [model.PipeBox(i, 100 - i // 2, 1, i % 3, 1) for i in range(100)]
+        ordered, path_taken, _ = loader.order(list(boxes))
+        nt.assert_equal(self._ordered_ids(boxes), [b.box_id for b in ordered])
+        nt.assert_equal(loader.SORTED, path_taken)
+
+    def test_load_stats(self):
+        stats = profiling.RunStats()
+        with mock.patch('ndtest.loader.open') as open_mock:
+            self._open_mock(open_mock, self.UNSORTED_ROWS)
+            loader.load(self.CSV_PATH_MOCK, stats)
+            self._open_mock(open_mock, sorted(self.UNSORTED_ROWS, key=lambda row: (row[1], row[3])))
+            loader.load(self.CSV_PATH_MOCK, stats)
+        nt.assert_equal(['load', 'sort'], stats.stages.keys())
+        nt.assert_equal((1, 1, 1), (stats.counters['sorted loads'], stats.counters['presorted loads'],
+                                    stats.counters['stragglers']))
+
+    def test_load_many(self):
+        texts = {'/path/%s.csv' % i: self._csv_text([[i, i + 1, 1, 0, 10], [i + 10, 0, 1, 0, 10]]) for i in range(5)}
+        paths = sorted(texts)
+        stats = profiling.RunStats()
+        with mock.patch('ndtest.loader.open') as open_mock:
+            open_mock.side_effect = lambda path: cStringIO.StringIO(texts[path])
+            for threads in (1, 3):
+                inspections = loader.load_many(paths, threads, stats)
+                nt.assert_equal([[i + 10, i] for i in range(5)], [[b.box_id for b in boxes] for boxes in inspections])
+        nt.assert_equal(10, stats.counters['presorted loads'] + stats.counters['sorted loads'])
+        nt.assert_true(gc.isenabled())
+
+    def test_load_many_invalid_row(self):
+        texts = {'/path/old.csv': self._csv_text([[1, 10, 20, 50, 20.0]]),
+                 '/path/new.csv': self._csv_text([[1, 10, 'XXX', 50, 20.0]])}
+        with mock.patch('ndtest.loader.open') as open_mock:
+            open_mock.side_effect = lambda path: cStringIO.StringIO(texts[path])
+            with nt.assert_raises_regexp(loader.DataLoaderException, 'Invalid data at row 1'):
+                loader.load_many(sorted(texts))
+        nt.assert_true(gc.isenabled())
+
+    def _open_mock(self, open_mock, rows):
+        open_mock.side_effect = lambda path: cStringIO.StringIO(self._csv_text(rows))
+
+    def _keys(self, boxes):
+        return [(b.box_id, b.x, b.l, b.a, b.w) for b in boxes]
+
+    UNSORTED_ROWS = [[1, 10, 20, 50, 20.0],
+                     [2, 10, 20, 55, 20],
+                     [3, 20, 20, 70, 10],
+                     [4, 20, 20, 20, 20],
+                     [5, 0.1, 1.5, 100, 30],
+                     [6, 20, 20, 70, 10]]
+
+    def test_iter_load(self):
+        with mock.patch('ndtest.loader.open') as open_mock:
+            rows = [[1, 10, 20, 50, 20.0], [2, 10, 20, 55, 20], [3, 20, 20, 20, 10]]
+            self._open_mock(open_mock, rows)
+            boxes = loader.iter_load(self.CSV_PATH_MOCK)
+
+            nt.assert_false(open_mock.called)
+            nt.assert_equal(self._keys(model.PipeBox(*row) for row in rows), self._keys(boxes))
+            nt.assert_equal(mock.call(self.CSV_PATH_MOCK), open_mock.call_args)
+
+    def test_iter_load_unsorted(self):
+        with mock.patch('ndtest.loader.open') as open_mock:
+            self._open_mock(open_mock, self.UNSORTED_ROWS)
+            boxes = loader.iter_load(self.CSV_PATH_MOCK)
+            nt.assert_equal(1, next(boxes).box_id)
+            nt.assert_equal(2, next(boxes).box_id)
+            nt.assert_equal(3, next(boxes).box_id)
+            with nt.assert_raises_regexp(loader.UnsortedDataException, 'Unsorted data at row 4'):
+                next(boxes)
+
+    def test_external_sort(self):
+        with mock.patch('ndtest.loader.open') as open_mock:
+            self._open_mock(open_mock, self.UNSORTED_ROWS)
+            expected = loader.load(self.CSV_PATH_MOCK)
+            for chunk_size in (1, 2, 4, 100):
+                boxes = loader.external_sort(self.CSV_PATH_MOCK, chunk_size=chunk_size)
+                nt.assert_equal(self._keys(expected), self._keys(boxes))
+
+    def test_external_sort_invalid_row(self):
+        with mock.patch('ndtest.loader.open') as open_mock:
+            self._open_mock(open_mock, [[1, 10, 20, 50, 20.0], [1, 10, 'XXX', 50, 20.0]])
+            with nt.assert_raises_regexp(loader.DataLoaderException, 'Invalid data at row 2'):
+                list(loader.external_sort(self.CSV_PATH_MOCK, chunk_size=1))
+
+    def test_is_sorted(self):
+        with mock.patch('ndtest.loader.open') as open_mock:
+            self._open_mock(open_mock, self.UNSORTED_ROWS)
+            nt.assert_false(loader.is_sorted(self.CSV_PATH_MOCK))
+            self._open_mock(open_mock, self.UNSORTED_ROWS[:3])
+            nt.assert_true(loader.is_sorted(self.CSV_PATH_MOCK))
+
+    def test_stream(self):
+        with mock.patch('ndtest.loader.open') as open_mock:
+            for rows in (self.UNSORTED_ROWS, self.UNSORTED_ROWS[:3]):
+                self._open_mock(open_mock, rows)
+                expected = loader.load(self.CSV_PATH_MOCK)
+                nt.assert_equal(self._keys(expected), self._keys(loader.stream(self.CSV_PATH_MOCK, chunk_size=2)))
@@ -0,0 +1,130 @@
+from nose import tools as nt
+import cStringIO
+import json
+
+from ndtest import inspection
+from ndtest import model
+from ndtest import output
+
+
+class TestOutput(object):
+
+    def _data(self):
+        old_data = [model.PipeBox(1, 270, 100, 200, 320)]
+        new_data = [model.PipeBox(1, 320, 100, 20, 40), model.PipeBox(2, 10, 10, 20, 40)]
+        return inspection.Collator.analyze(old_data, new_data), old_data, new_data
+
+    def test_colorize(self):
+        nt.assert_equal('\x1b[31mtext\x1b[0m', output.colorize('text', 'red'))
+
+    def test_buffered_writer(self):
+        stream = cStringIO.StringIO()
+        writer = output.BufferedWriter(stream, color=False, buffer_size=10)
+        writer.write_line('first', fg='red')
+        nt.assert_equal('', stream.getvalue())
+        writer.write_line('second')
+        nt.assert_equal('first\nsecond\n', stream.getvalue())
+        writer.write_line('third', fg='red')
+        writer.flush()
+        nt.assert_equal('first\nsecond\nthird\n', stream.getvalue())
+
+    def test_buffered_writer_color(self):
+        stream = cStringIO.StringIO()
+        writer = output.BufferedWriter(stream, color=True)
+        writer.write_line('first', fg='red')
+        writer.write_line('second')
+        writer.flush()
+        nt.assert_equal('\x1b[31mfirst\x1b[0m\nsecond\n', stream.getvalue())
+
+    def test_print_results(self):
+        stream = cStringIO.StringIO()
+        output.print_results(*self._data(), stream=stream)
+        text = stream.getvalue()
+
+        nt.assert_not_in('\x1b[', text)
+        nt.assert_equal(1, text.count("doesn't overlap"))
+        nt.assert_equal(1, text.count('New box <PipeBox [id=1,x=320,l=100,a=20,w=40]> overlaps 1 old box:'))
+        nt.assert_equal(1, text.count('percent overlap: new = 50.00 % - old = 6.25 %'))
+
+    def test_print_results_reverse_color(self):
+        stream = cStringIO.StringIO()
+        output.print_results(*self._data(), reverse=True, stream=stream, color=True)
+        text = stream.getvalue()
+
+        nt.assert_equal(1, text.count('\x1b[32mOld box <PipeBox [id=1,x=270,l=100,a=200,w=320]> overlaps 1 old box:'))
+
+    def test_print_stream(self):
+        data, old_data, new_data = self._data()
+        expected = cStringIO.StringIO()
+        output.print_results(data, old_data, new_data, stream=expected)
+
+        stream = cStringIO.StringIO()
+        output.print_stream(inspection.SweepCollator.iter_groups(old_data, new_data), stream=stream)
+
+        nt.assert_equal(expected.getvalue(), stream.getvalue())
+
+    def test_print_summary(self):
+        _, old_data, new_data = self._data()
+        stream = cStringIO.StringIO()
+        output.print_summary(inspection.SweepCollator.summarize(old_data, new_data), stream=stream)
+        report = stream.getvalue()
+        nt.assert_in('New boxes: %s' % len(new_data), report)
+        nt.assert_in('Overlapping pairs: 1\n', report)
+        nt.assert_in('50.00 -  60.00 %: new = 1 - old = 0', report)
+        nt.assert_in('x = 300.0 - 400.0: 34.9066', report)
+        nt.assert_not_in('\x1b[', report)
+
+    def _metadata(self):
+        data, _, _ = self._data()
+        return list(output.iter_metadata(data))
+
+    def test_iter_metadata(self):
+        metadata = self._metadata()
+        nt.assert_equal(1, len(metadata))
+        nt.assert_equal((1, 1), (metadata[0].id_new, metadata[0].id_old))
+
+    def test_write_records_jsonl(self):
+        stream = cStringIO.StringIO()
+        output.write_records(iter(self._metadata()), 'jsonl', stream)
+        lines = stream.getvalue().splitlines()
+
+        nt.assert_equal(1, len(lines))
+        record = json.loads(lines[0])
+        nt.assert_equal(set(output.RECORD_FIELDS), set(record))
+        nt.assert_equal(1, record['id_new'])
+        nt.assert_almost_equal(50, record['percent_new'])
+        nt.assert_almost_equal(6.25, record['percent_old'])
+        nt.assert_almost_equal(self._metadata()[0].area, record['area'])
+
+    def test_write_records_csv(self):
+        stream = cStringIO.StringIO()
+        output.write_records(iter(self._metadata()), 'csv', stream)
+        lines = stream.getvalue().splitlines()
+
+        nt.assert_equal(['id_new,id_old,percent_new,percent_old,area', '1,1,50.0,6.25,%r' % self._metadata()[0].area],
+                        lines)
+
+    def test_write_records_columnar(self):
+        metadata = self._metadata() * 5
+        stream = cStringIO.StringIO()
+        original_size = output.COLUMNAR_GROUP_SIZE
+        output.COLUMNAR_GROUP_SIZE = 2
+        try:
+            output.write_records(iter(metadata), 'columnar', stream)
+        finally:
+            output.COLUMNAR_GROUP_SIZE = original_size
+        stream.seek(0)
+        groups = list(output.read_columnar(stream))
+
+        nt.assert_equal([2, 2, 1], [len(group['id_new']) for group in groups])
+        nt.assert_equal((50.0, 50.0), groups[0]['percent_new'])
+        nt.assert_equal((metadata[0].area,), groups[2]['area'])
+
+    def test_print_results_store(self):
+        _, old_data, new_data = self._data()
+        store = inspection.Collator.collate(old_data, new_data)
+        for reverse in (False, True):
+            expected, stream = cStringIO.StringIO(), cStringIO.StringIO()
+            output.print_results(*self._data(), reverse=reverse, stream=expected)
+            output.print_results(store, old_data, new_data, reverse=reverse, stream=stream)
+            nt.assert_equal(expected.getvalue(), stream.getvalue())
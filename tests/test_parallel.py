@@ -0,0 +1,42 @@
+from nose import tools as nt
+import random
+
+from ndtest import inspection
+from ndtest import parallel
+from tests.test_inspection import flatten, random_boxes
+
+
+class TestParallel(object):
+
+    def test_partition(self):
+        rnd = random.Random(29)
+        old_data, new_data = random_boxes(rnd, 100), random_boxes(rnd, 100)
+
+        partitions = parallel.partition(old_data, new_data, 7)
+
+        nt.assert_equal(7, len(partitions))
+        nt.assert_equal(new_data, [box for _, new_chunk in partitions for box in new_chunk])
+        for old_chunk, new_chunk in partitions:
+            expected = inspection.Collator.analyze(old_data, new_chunk)
+            nt.assert_equal(flatten(expected), flatten(inspection.Collator.analyze(old_chunk, new_chunk)))
+
+    def test_partition__empty(self):
+        nt.assert_equal([], parallel.partition([], random_boxes(random.Random(1), 10), 3))
+
+    def test_analyze(self):
+        rnd = random.Random(31)
+        old_data, new_data = random_boxes(rnd, 200), random_boxes(rnd, 200)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        data = parallel.analyze(old_data, new_data, 3)
+
+        nt.assert_equal(flatten(expected), flatten(data))
+
+    def test_analyze__lean(self):
+        rnd = random.Random(43)
+        old_data, new_data = random_boxes(rnd, 100), random_boxes(rnd, 100)
+
+        expected = inspection.Collator.analyze(old_data, new_data)
+        data = parallel.analyze(old_data, new_data, 2, engine='index', lean=True)
+
+        nt.assert_equal(flatten(expected), flatten(data))
@@ -0,0 +1,69 @@
+from nose import tools as nt
+import cStringIO
+import random
+
+from ndtest import inspection
+from ndtest import model
+from ndtest import profiling
+from tests.test_inspection import flatten, random_boxes
+
+
+class TestRunStats(object):
+
+    def test_stage(self):
+        stats = profiling.RunStats()
+        for _ in range(2):
+            with stats.stage('load'):
+                pass
+        with profiling.stage(stats, 'sort'):
+            pass
+        with profiling.stage(None, 'sort'):
+            pass
+
+        nt.assert_equal(['load', 'sort'], stats.stages.keys())
+        seconds, peak = stats.stages['load']
+        nt.assert_greater_equal(seconds, 0)
+        nt.assert_greater(peak, 0)
+
+    def test_report(self):
+        stats = profiling.RunStats()
+        with stats.stage('analyze'):
+            model.PipeBox(1, 0, 1, 350, 20).plain_regions
+        stats.count('PASS', 3)
+
+        stream = cStringIO.StringIO()
+        stats.report(stream)
+        lines = stream.getvalue().splitlines()
+
+        nt.assert_true(lines[1].startswith('analyze'))
+        nt.assert_in('PASS                            3', lines)
+        nt.assert_in('regions allocated               2', lines)
+
+
+class TestInstrument(object):
+
+    def test_instrument(self):
+        rnd = random.Random(37)
+        old_data, new_data = random_boxes(rnd, 100), random_boxes(rnd, 100)
+        for collator in (inspection.Collator, inspection.SweepCollator, inspection.IndexCollator):
+            stats = profiling.RunStats()
+            instrumented = profiling.instrument(collator, stats)
+            data = instrumented.analyze(old_data, new_data)
+
+            nt.assert_equal('Instrumented%s' % collator.__name__, instrumented.__name__)
+            nt.assert_equal(flatten(collator.analyze(old_data, new_data)), flatten(data))
+            pairs = sum(len(overlaps) for overlaps in data.itervalues())
+            nt.assert_equal(pairs + stats.counters['empty overlaps'], stats.counters['candidate pairs'])
+            nt.assert_equal(stats.counters['statements'],
+                            sum(stats.counters[name] for name in ('CONTINUE', 'BREAK', 'PASS')))
+            if collator is not inspection.IndexCollator:
+                # The index prunes the candidates by itself, without `_prompt_statement`.
+                nt.assert_equal(stats.counters['PASS'], stats.counters['candidate pairs'])
+
+    def test_instrument__summarize(self):
+        rnd = random.Random(39)
+        old_data, new_data = random_boxes(rnd, 100), random_boxes(rnd, 100)
+        stats = profiling.RunStats()
+        overlap_summary = profiling.instrument(inspection.SweepCollator, stats).summarize(old_data, new_data)
+        nt.assert_equal(overlap_summary.pairs + stats.counters['empty overlaps'], stats.counters['candidate pairs'])
+        nt.assert_equal(stats.counters['PASS'], stats.counters['candidate pairs'])
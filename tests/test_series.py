@@ -0,0 +1,82 @@
+from nose import tools as nt
+import cStringIO
+import random
+
+from ndtest import inspection
+from ndtest import model
+from ndtest import output
+from ndtest import series
+from tests.test_inspection import flatten, random_boxes
+
+
+def make_series():
+    """ Three runs where feature A grows, feature B splits in two, feature C is missed by the second run and
+    feature D appears in the last one.
+    """
+    return series.Series([
+        [model.PipeBox(1, 0, 1, 10, 10), model.PipeBox(2, 10, 2, 350, 20), model.PipeBox(3, 20, 1, 90, 10)],
+        [model.PipeBox(1, 0, 1.5, 10, 12), model.PipeBox(2, 10, 1, 355, 10), model.PipeBox(3, 11.5, 1, 0, 8)],
+        [model.PipeBox(7, 0, 2, 8, 15), model.PipeBox(8, 10, 2.5, 350, 20), model.PipeBox(9, 20.5, 1, 92, 10),
+         model.PipeBox(10, 40, 1, 0, 10)],
+    ])
+
+
+class TestSeries(object):
+
+    def test_pairs(self):
+        runs = series.Series([[], [], [], []])
+        nt.assert_equal([(0, 1), (1, 2), (2, 3)], runs.pairs())
+        nt.assert_equal([(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)], runs.pairs(series.ALL_PAIRS))
+
+    @nt.raises(ValueError)
+    def test_pairs__mode(self):
+        series.Series([[], []]).pairs('random')
+
+    def test_collate(self):
+        rnd = random.Random(47)
+        runs = series.Series([random_boxes(rnd, 50, first_id=100 * i) for i in range(3)])
+
+        results = runs.collate(series.ALL_PAIRS, lean=False)
+
+        nt.assert_equal([(0, 1), (0, 2), (1, 2)], sorted(results))
+        for (old_run, new_run), data in results.iteritems():
+            expected = inspection.Collator.analyze(runs.runs[old_run], runs.runs[new_run])
+            nt.assert_equal(flatten(expected), flatten(data))
+        nt.assert_equal([0, 1], sorted(runs._indexes))
+
+    def test_tracks(self):
+        tracks = make_series().tracks()
+
+        nt.assert_equal([[(0, 1), (1, 1), (2, 7)], [(0, 2), (1, 2), (1, 3), (2, 8)], [(0, 3)], [(2, 9)], [(2, 10)]],
+                        [[(run, box.box_id) for run, box in track.boxes] for track in tracks])
+        nt.assert_equal([0, 1, 2], tracks[0].runs)
+        nt.assert_almost_equal(3., tracks[0].growth())
+        areas = tracks[1].areas()
+        nt.assert_equal([0, 1, 2], [run for run, _ in areas])
+        nt.assert_almost_equal(model.PipeBox(2, 10, 1, 355, 10).area() + model.PipeBox(3, 11.5, 1, 0, 8).area(),
+                               areas[1][1])
+
+    def test_tracks__all_pairs(self):
+        tracks = make_series().tracks(series.ALL_PAIRS)
+
+        nt.assert_equal([[(0, 1), (1, 1), (2, 7)], [(0, 2), (1, 2), (1, 3), (2, 8)], [(0, 3), (2, 9)], [(2, 10)]],
+                        [[(run, box.box_id) for run, box in track.boxes] for track in tracks])
+
+    def test_print_tracks(self):
+        stream = cStringIO.StringIO()
+        output.print_tracks(make_series().tracks(series.ALL_PAIRS), stream)
+        report = stream.getvalue()
+
+        nt.assert_equal(4, report.count('Track '))
+        nt.assert_in('Track 3 found in 2 runs, growth = 1.00', report)
+        nt.assert_in('Track 4 found in 1 run, growth = 1.00', report)
+
+    def test_print_tracks__null_area(self):
+        # The loader accepts boxes of null length.
+        tracks = series.Series([[model.PipeBox(1, 0, 0, 10, 10)], [model.PipeBox(1, 5, 1, 10, 10)]]).tracks()
+        nt.assert_is_none(tracks[0].growth())
+
+        stream = cStringIO.StringIO()
+        output.print_tracks(tracks, stream)
+        nt.assert_in('Track 1 found in 1 run, growth = n/a', stream.getvalue())
+        nt.assert_in('Track 2 found in 1 run, growth = 1.00', stream.getvalue())
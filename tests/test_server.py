@@ -0,0 +1,161 @@
+from nose import tools as nt
+import cStringIO
+import httplib
+import json
+import mock
+import os
+import threading
+import urllib
+import urllib2
+
+from ndtest import inspection
+from ndtest import loader
+from ndtest import output
+from ndtest import server
+
+
+class TestServer(object):
+
+    OLD_PATH = os.path.join('doc', 'inspection_data_old.csv')
+    NEW_PATH = os.path.join('doc', 'inspection_data_new.csv')
+
+    def setup(self):
+        self.baselines = server.BaselineStore()
+        self.server = server.ComparisonServer(('127.0.0.1', 0), self.baselines)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def teardown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def _url(self, resource, **query):
+        return 'http://%s:%s%s?%s' % (self.server.server_address + (resource, urllib.urlencode(query)))
+
+    def _post(self, url, data=''):
+        return urllib2.urlopen(urllib2.Request(url, data)).read()
+
+    def _report(self, reverse=False):
+        old_data, new_data = loader.load(self.OLD_PATH), loader.load(self.NEW_PATH)
+        stream = cStringIO.StringIO()
+        output.print_results(inspection.Collator.analyze(old_data, new_data), old_data, new_data, reverse, stream)
+        return stream.getvalue()
+
+    def test_collate__path(self):
+        nt.assert_equal(self._report(), self._post(self._url('/collate', old=self.OLD_PATH, new=self.NEW_PATH)))
+        nt.assert_equal(self._report(True),
+                        self._post(self._url('/collate', old=self.OLD_PATH, new=self.NEW_PATH, reverse=1)))
+
+    def test_collate__upload(self):
+        with open(self.NEW_PATH) as new_file:
+            upload = new_file.read()
+        records = self._post(self._url('/collate', old=self.OLD_PATH, format='jsonl', lean=1), upload)
+        nt.assert_equal(18, len([json.loads(line) for line in records.splitlines()]))
+
+    def test_baselines(self):
+        for _ in range(3):
+            self._post(self._url('/collate', old=self.OLD_PATH, new=self.NEW_PATH))
+        baselines = json.loads(urllib2.urlopen(self._url('/baselines')).read())
+        nt.assert_equal([{'path': os.path.abspath(self.OLD_PATH), 'boxes': 6}], baselines)
+        nt.assert_is(self.baselines.get(self.OLD_PATH), self.baselines.get(os.path.abspath(self.OLD_PATH)))
+
+    def test_collate__concurrent(self):
+        expected = self._report()
+        reports = []
+        threads = [threading.Thread(target=lambda: reports.append(
+            self._post(self._url('/collate', old=self.OLD_PATH, new=self.NEW_PATH)))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        nt.assert_equal([expected] * 8, reports)
+        nt.assert_equal(1, len(self.baselines))
+
+    def test_baselines__cold_load(self):
+        warm_index = self.baselines.get(self.OLD_PATH)
+        loading, release = threading.Event(), threading.Event()
+        load = loader.load
+
+        def slow_load(path, stats=None):
+            loading.set()
+            release.wait()
+            return load(path, stats)
+
+        with mock.patch.object(server.loader, 'load', side_effect=slow_load) as load_mock:
+            thread = threading.Thread(target=self.baselines.get, args=(self.NEW_PATH,))
+            thread.start()
+            try:
+                nt.assert_true(loading.wait(5))
+                # A baseline already in memory is served while another one is being loaded.
+                found = []
+                warm_thread = threading.Thread(target=lambda: found.append(self.baselines.get(self.OLD_PATH)))
+                warm_thread.start()
+                warm_thread.join(5)
+                nt.assert_equal(1, len(found))
+                nt.assert_is(warm_index, found[0])
+                nt.assert_equal(1, len(self.baselines))
+            finally:
+                release.set()
+                thread.join()
+            nt.assert_equal(1, load_mock.call_count)
+        nt.assert_equal(2, len(self.baselines))
+
+    def test_baselines__paths(self):
+        self.server.baselines = server.BaselineStore(paths=[self.OLD_PATH])
+        nt.assert_equal(self._report(), self._post(self._url('/collate', old=os.path.abspath(self.OLD_PATH),
+                                                             new=self.NEW_PATH)))
+        code, message = self._error(self._url('/collate', old=self.NEW_PATH, new=self.NEW_PATH))
+        nt.assert_equal(403, code)
+        nt.assert_in('is not a baseline of the server', message)
+        nt.assert_equal(1, len(self.server.baselines))
+
+    def _error(self, url, data=''):
+        try:
+            self._post(url, data)
+        except urllib2.HTTPError as e:
+            return e.code, e.read()
+        raise AssertionError('No error for %s' % url)
+
+    def test_errors(self):
+        nt.assert_equal(404, self._error(self._url('/unknown'))[0])
+        nt.assert_equal(400, self._error(self._url('/collate', new=self.NEW_PATH))[0])
+        nt.assert_equal(400, self._error(self._url('/collate', old=self.OLD_PATH, format='xml'))[0])
+        nt.assert_equal(404, self._error(self._url('/collate', old='missing.csv', new=self.NEW_PATH))[0])
+        code, message = self._error(self._url('/collate', old=self.OLD_PATH), 'id\tx\n')
+        nt.assert_equal(400, code)
+        nt.assert_in('Invalid header', message)
+
+    def test_errors__malformed_upload(self):
+        header = 'id\tx\tl\ta\tw\n'
+        for upload, expected in ((header + '1\t10\t20\t50\t20\n\n2\t10\t20\t55\t20\n', 'row 2'),
+                                 (header + '1\t10\t20\t50\n', 'row 1'),
+                                 (header + '1\t10\t20\t50\t400\n', 'w <= 360'),
+                                 (header + '1\t10\t20\t50\t20\n2\t50\t0\t100\t10\n', 'row 2'),
+                                 (header + '1\t10\t20\t50\t0\n', 'row 1')):
+            code, message = self._error(self._url('/collate', old=self.OLD_PATH), upload)
+            nt.assert_equal(400, code)
+            nt.assert_in(expected, message)
+        # The server still answers after the errors.
+        nt.assert_equal(self._report(), self._post(self._url('/collate', old=self.OLD_PATH, new=self.NEW_PATH)))
+
+    def test_errors__internal(self):
+        for output_format, method in (('text', 'collate'), ('jsonl', 'iter_analyze')):
+            with mock.patch.object(server.inspection.IndexCollator, method, side_effect=RuntimeError('collation')):
+                code, message = self._error(self._url('/collate', old=self.OLD_PATH, new=self.NEW_PATH,
+                                                      format=output_format))
+            nt.assert_equal(500, code)
+            nt.assert_equal('Internal error\n', message)
+        nt.assert_equal(self._report(), self._post(self._url('/collate', old=self.OLD_PATH, new=self.NEW_PATH)))
+
+    def test_errors__content_length(self):
+        connection = httplib.HTTPConnection(*self.server.server_address)
+        try:
+            connection.putrequest('POST', '/collate?old=%s' % urllib.quote(self.OLD_PATH))
+            connection.putheader('Content-Length', 'many')
+            connection.endheaders()
+            response = connection.getresponse()
+            nt.assert_equal(400, response.status)
+            nt.assert_in('Invalid Content-Length', response.read())
+        finally:
+            connection.close()
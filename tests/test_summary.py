@@ -0,0 +1,84 @@
+from nose import tools as nt
+import random
+
+from ndtest import columnar
+from ndtest import inspection
+from ndtest import model
+from ndtest import summary
+from tests.test_inspection import random_boxes
+
+
+class TestOverlapSummary(object):
+
+    def test_add(self):
+        overlap_summary = summary.OverlapSummary(bins=4, segment_length=10)
+        new_box = model.PipeBox(1, 5, 20, 0, 90)
+        old_boxes = [model.PipeBox(1, 0, 10, 0, 90), model.PipeBox(2, 15, 30, 350, 20),
+                     model.PipeBox(3, 0, 30, 180, 10)]
+        overlap_summary.add(new_box, old_boxes, new_box.overlap_many(old_boxes))
+        overlap_summary.add(model.PipeBox(2, 100, 1, 0, 10), [], [])
+
+        nt.assert_equal(2, overlap_summary.new_boxes)
+        nt.assert_equal(1, overlap_summary.unmatched_new)
+        nt.assert_equal(2, overlap_summary.pairs)
+        # Percents of new are 25 and 50 / 9, of old 50 and 50 / 3.
+        nt.assert_equal([1, 1, 0, 0], overlap_summary.percent_new_histogram)
+        nt.assert_equal([1, 0, 1, 0], overlap_summary.percent_old_histogram)
+        nt.assert_almost_equal(new_box.area() * (1 / 4. + 1 / 18.), overlap_summary.area)
+        segments = overlap_summary.segments()
+        nt.assert_equal([(0, 10), (10, 20), (20, 30)], [(x_start, x_end) for x_start, x_end, _ in segments])
+        # The first pair overlaps along x = 5 - 10, the second along x = 15 - 25.
+        expected = [new_box.area() / 4, new_box.area() / 36, new_box.area() / 36]
+        for (_, _, area), expected_area in zip(segments, expected):
+            nt.assert_almost_equal(expected_area, area)
+
+    def test_histogram_edges(self):
+        nt.assert_equal([(0, 25), (25, 50), (50, 75), (75, 100)], summary.OverlapSummary(bins=4).histogram_edges())
+        overlap_summary = summary.OverlapSummary(bins=4)
+        overlap_summary.add_pair(model.PipeBox(1, 0, 1, 0, 10), model.PipeBox(1, 0, 1, 0, 10), 1, 100, 100.0001)
+        nt.assert_equal([0, 0, 0, 1], overlap_summary.percent_old_histogram)
+
+
+class TestSummarize(object):
+
+    @staticmethod
+    def _expected(old_data, new_data, bins, segment_length):
+        expected = summary.OverlapSummary(bins, segment_length)
+        data = inspection.Collator.analyze(old_data, new_data)
+        old_map = {box.box_id: box for box in old_data}
+        for new_box in new_data:
+            overlaps = data.get(new_box.box_id, {})
+            for id_old, metadata in sorted(overlaps.items()):
+                expected.add_pair(old_map[id_old], new_box, metadata.area, metadata.percent_new, metadata.percent_old)
+            expected.add_new_box(bool(overlaps))
+        return expected
+
+    def test_summarize__same_as_analyze(self):
+        rnd = random.Random(41)
+        old_data, new_data = random_boxes(rnd, 300), random_boxes(rnd, 300)
+        expected = self._expected(old_data, new_data, 20, 50)
+        collators = [inspection.Collator, inspection.SweepCollator, inspection.IndexCollator,
+                     inspection.GridCollator]
+        if columnar.numpy is not None:
+            collators.append(inspection.ColumnarCollator)
+        for collator in collators:
+            overlap_summary = collator.summarize(old_data, new_data, summary.OverlapSummary(20, 50))
+            nt.assert_equal(expected.new_boxes, overlap_summary.new_boxes)
+            nt.assert_equal(expected.unmatched_new, overlap_summary.unmatched_new)
+            nt.assert_equal(expected.pairs, overlap_summary.pairs)
+            nt.assert_equal(expected.percent_new_histogram, overlap_summary.percent_new_histogram)
+            nt.assert_equal(expected.percent_old_histogram, overlap_summary.percent_old_histogram)
+            nt.assert_almost_equal(expected.area, overlap_summary.area)
+            nt.assert_equal(sorted(expected.segment_areas), sorted(overlap_summary.segment_areas))
+            for segment, area in expected.segment_areas.iteritems():
+                nt.assert_almost_equal(area, overlap_summary.segment_areas[segment])
+            nt.assert_almost_equal(overlap_summary.area, sum(overlap_summary.segment_areas.itervalues()))
+
+    def test_summarize__iterators(self):
+        rnd = random.Random(43)
+        old_data, new_data = random_boxes(rnd, 100), random_boxes(rnd, 100)
+        expected = inspection.SweepCollator.summarize(old_data, new_data)
+        overlap_summary = inspection.SweepCollator.summarize(iter(old_data), iter(new_data))
+        nt.assert_equal((expected.new_boxes, expected.unmatched_new, expected.pairs, expected.segment_areas),
+                        (overlap_summary.new_boxes, overlap_summary.unmatched_new, overlap_summary.pairs,
+                         overlap_summary.segment_areas))
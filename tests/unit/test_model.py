@@ -2,6 +2,8 @@ from nose import tools as nt
 from ndtest import model
 
 import math
+import pickle
+import random
 
 
 class TestBox(object):
@@ -19,6 +21,21 @@ class TestBox(object):
         area = pb.area()
         nt.assert_almost_equal(21.3 * math.radians(21.3), area)
 
+    def test_no_instance_dict(self):
+        nt.assert_false(hasattr(model.Box(120, 40, 20, 60), '__dict__'))
+        nt.assert_false(hasattr(model.BoundBox(120, 40, 20, 60), '__dict__'))
+        nt.assert_false(hasattr(model.PipeBox(1, 120, 40, 20, 60), '__dict__'))
+
+    def test_pickle(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            box = pickle.loads(pickle.dumps(model.BoundBox(120, 40, 20, 60), protocol))
+            nt.assert_is_instance(box, model.BoundBox)
+            nt.assert_equal(model.BoundBox(120, 40, 20, 60), box)
+            box = pickle.loads(pickle.dumps(model.PipeBox(1, 120, 40, 300, 100), protocol))
+            nt.assert_is_instance(box, model.PipeBox)
+            nt.assert_equal(1, box.box_id)
+            nt.assert_equal(model.PipeBox(1, 120, 40, 300, 100), box)
+
     def test__eq__equal(self):
         pb1 = model.Box(120, 40, 20, 60)
         pb2 = model.Box(120, 40, 20, 60)
@@ -40,6 +57,10 @@ class TestBox(object):
         pb2 = model.Box(120, 40, 20, 61)
         nt.assert_not_equal(pb1, pb2)
 
+    def test__ne__(self):
+        nt.assert_false(model.Box(120, 40, 20, 60) != model.Box(120, 40, 20, 60))
+        nt.assert_true(model.Box(120, 40, 20, 60) != model.Box(121, 40, 20, 60))
+
 
 class TestBoundBox(object):
 
@@ -107,6 +128,54 @@ class TestPipeBox(object):
         nt.assert_equal(regions[0], model.BoundBox(20, 100, 0, 200 + 200 - 360))
         nt.assert_equal(regions[1], model.BoundBox(20, 100, 200, 160))
 
+    def test_plain_regions_cached(self):
+        model.PipeBox.allocated_regions = 0
+        pb = model.PipeBox(1, 20, 100, 200, 200)
+        regions = pb.plain_regions
+        nt.assert_is(regions, pb.plain_regions)
+        nt.assert_equal(2, model.PipeBox.allocated_regions)
+
+        pb.w = 100
+        nt.assert_equal((model.BoundBox(20, 100, 200, 100),), pb.plain_regions)
+        nt.assert_equal(3, model.PipeBox.allocated_regions)
+
+        pb.x = 30
+        nt.assert_equal((model.BoundBox(30, 100, 200, 100),), pb.plain_regions)
+        nt.assert_equal(4, model.PipeBox.allocated_regions)
+
+    def test_region_bounds(self):
+        pb = model.PipeBox(1, 20, 100, 200, 200)
+        nt.assert_equal(((20, 120, 0, 40), (20, 120, 200, 360)), pb.region_bounds)
+        nt.assert_is(pb.region_bounds, pb.region_bounds)
+        pb.a = 10
+        nt.assert_equal(((20, 120, 10, 210),), pb.region_bounds)
+
+    def test_overlap_many(self):
+        pb = model.PipeBox(1, 20, 100, 200, 200)
+        candidates = [model.PipeBox(2, 20, 100, 70, 70), model.PipeBox(3, 20, 100, 220, 160),
+                      model.PipeBox(4, 70, 100, 10, 30), model.PipeBox(5, 120, 10, 0, 360)]
+        results = pb.overlap_many(candidates)
+
+        nt.assert_equal([None, None], [results[0], results[3]])
+        area = math.radians(160) * 100
+        nt.assert_equal((area, area / pb.area() * 100, 100.), results[1])
+        area = math.radians(30) * 50
+        nt.assert_equal((area, area / pb.area() * 100, 50.), results[2])
+        nt.assert_equal([], pb.overlap_many([]))
+
+    def test_overlap_many__same_as_overlap(self):
+        rnd = random.Random(59)
+        boxes = [model.PipeBox(i, rnd.uniform(0, 10), rnd.uniform(0.1, 5), rnd.uniform(0, 359.9),
+                               rnd.uniform(0.1, 360)) for i in range(60)]
+        for pb in boxes:
+            for candidate, result in zip(boxes, pb.overlap_many(boxes)):
+                overlaps = candidate.overlap(pb)
+                if not overlaps:
+                    nt.assert_is_none(result)
+                    continue
+                area = sum(o.area() for o in overlaps)
+                nt.assert_equal((area, area / pb.area() * 100, area / candidate.area() * 100), result)
+
     def test_overlap_empty(self):
         pb1 = model.PipeBox(1, 20, 100, 200, 200)
         pb2 = model.PipeBox(1, 20, 100, 70, 70)